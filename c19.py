@@ -9,19 +9,30 @@
 #---------------------------------------------------------------------------------------------------
 import data_ts
 
-import matplotlib as mlp
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
 import csv
+import shlex
 import sys,os,getopt
 import datetime
-# initial settings
-mlp.rcParams['axes.linewidth'] = 2
+
+# matplotlib and pandas take most of the startup time, they are only imported to plot
+mlp = None
+plt = None
+pd = None
 
 #===================================================================================================
 # HELPERS
 #===================================================================================================
+def import_plotting(interactive=True):
+    global mlp,plt,pd
+    import matplotlib as mlp
+    if not interactive:
+        mlp.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    # initial settings
+    mlp.rcParams['axes.linewidth'] = 2
+    return
+
 def find_xlimits(times,tmin,tmax):
     xmin = times[0]
     xmax = times[-1]
@@ -33,41 +44,6 @@ def find_xlimits(times,tmin,tmax):
 
     return xmin,xmax
 
-def trim_times_series_ids(tmin,tmax,times):
-
-    # convert date limits into times
-
-    try:
-        tmin = str(tmin.date())
-    except:
-        pass
-
-    try:
-        tmax = str(tmax.date())
-    except:
-        pass
-
-    time_min = datetime.datetime.strptime(tmin,"%Y-%m-%d")
-    time_max = datetime.datetime.strptime(tmax,"%Y-%m-%d")
-
-    # find indices looking into times array
-    imin = -1
-    imax = -1
-    i = 0
-    for time in times:
-        t = datetime.datetime.strptime(str(time)[0:10],"%Y-%m-%d")
-        if imin == -1 and t>=time_min:
-            imin = i
-        if t<=time_max:
-            imax = i+1
-        if t>time_max:
-            imax = i+1
-            break
-        i += 1
-
-    # return the indices
-    return imin,imax
-
 def update_file(get_cmd,data_url,data_file):
     if not quiet:
         print(" Update the data file: %s"%data_file)
@@ -126,7 +102,7 @@ def read_data(data_file,delta,us,scale=1.0):
 
     return (times, values)
 
-def set_plot_style(logx,logy,delta,value_name):
+def set_plot_style(logx,logy,delta,value_name,relative=False,combine=1):
     SMALL_SIZE = 22
     MEDIUM_SIZE = 30
     BIGGER_SIZE = 32
@@ -180,141 +156,207 @@ web_file_confirmed_simus = "time_series_covid19_confirmed_SIMUS.csv"
 web_file_deaths_simus = "time_series_covid19_deaths_SIMUS.csv"
 
 #===================================================================================================
-# MAIN
+# PLOT JOBS
 #===================================================================================================
 # Define string to explain usage of the script
-usage  = "\nUsage: covid-19_data.py --tags=tag1,tag43,tag300 [ --tmin=<first-day:%Y-%m-%d> --tmax=<last-day:%Y-%m-%d> --vmax=<nmax> --deaths --delta --relative --logy --logx --nopng --noplot --quiet ]\n"
-valid = ['tags=','tmin=','tmax=','vmax=','combine=','debug','update','death','delta','relative','logy','logx','us','sim','mc','mc_file=','nopng','quiet','help']
-
-#except ex as getopt.GetoptError:
-#    try:
-#        opts, args = getopt.getopt(sys.argv[1:], "", valid)
-#    finally:
-#        print(usage)
-#        print(str(ex))
-#        sys.exit(1)
-opts, args = getopt.getopt(sys.argv[1:], "", valid)
-        
-# read all command line options
-tags = [ 'US','Massachusetts','Switzerland','France']
-tmin = 0
-tmax = 0
-vmax = 0
-combine = 1
-update = False
-death = False
-delta = False
-relative = False
-logx = False
-logy = False
-us = False
-sim = False
-mc = False
-mc_file = ""
-quiet = False
-nopng = False
-noplot = False
-
-for opt, arg in opts:
-    if opt == "--help":
-        print(usage)
-        sys.exit(0)
-    if opt == "--debug":
-        debug = True
-    if opt == "--tags":
-        tags = arg.split(",")
-    if opt == "--tmin":
-        tmin = pd.DatetimeIndex([arg])[0]
-        tmin = datetime.datetime.strptime(arg,'%Y-%m-%d')
-    if opt == "--tmax":
-        tmax = datetime.datetime.strptime(arg,'%Y-%m-%d')
-    if opt == "--vmax":
-        vmax = int(arg)
-    if opt == "--combine":
-        combine = max(1,int(arg))
-    if opt == "--death":
-        death = True
-    if opt == "--update":
-        update = True
-    if opt == "--delta":
-        delta = True
-    if opt == "--relative":
-        relative = True
-    if opt == "--logx":
-        logx = True
-    if opt == "--logy":
-        logy = True
-    if opt == "--quiet":
-        quiet = True
-    if opt == "--nopng":
-        nopng = True
-    if opt == "--noplot":
-        noplot = True
-
-# determine which input
-value_name = 'Infected'
-if death:
-    value_name = 'Deaths'
-
-# deal with the input data
-data = data_ts.Data_ts("%s/data"%(os.environ.get('KRONE_BASE')))
-if update:
-    data.update_files(quiet)
-data.load_data(quiet)
-data.combine_values(combine)
-# not working ?! # data.rolling_values(combine)
-data.summary()
-
-# create the data axis points
-times = pd.DatetimeIndex(data.times)
-
-# want to look at deaths or infections
-if death:
-    values = data.deceased
-else:
-    values = data.infected
-
-# want to look at cummulative or deltas
-if delta:
-    for tag in tags:
-        values[tag][1:] = np.diff(values[tag])
-        values[tag][0] = 0
-
-# relative to total population in percent
-if relative:
-    for tag in tags:
+usage  = "\nUsage: c19.py --tags=tag1,tag43,tag300 [ --tmin=<first-day:%Y-%m-%d> --tmax=<last-day:%Y-%m-%d> --vmax=<nmax> --combine=<ndays> --rolling=<ndays> --deaths --delta --relative --logy --logx --png=<file> --nopng --noplot --quiet ]\n" \
+       + "       c19.py --batch=<job-file> [ --nproc=<n> --update --quiet ]   (one line of plot options per png)\n"
+valid = ['tags=','tmin=','tmax=','vmax=','combine=','rolling=','debug','update','death','delta','relative','logy','logx','us','sim','mc','mc_file=','png=','batch=','nproc=','nopng','noplot','quiet','help']
+
+#---------------------------------------------------------------------------------------------------
+# read the command line options of one plot (starting from the given defaults)
+#---------------------------------------------------------------------------------------------------
+def read_options(argv,defaults=None):
+    if defaults is None:
+        o = { 'tags': [ 'US','Massachusetts','Switzerland','France'], 'tmin': 0, 'tmax': 0,
+              'vmax': 0, 'combine': 1, 'rolling': 1, 'update': False, 'death': False,
+              'delta': False, 'relative': False, 'logx': False, 'logy': False, 'quiet': False,
+              'png': './c19.png', 'nopng': False, 'noplot': False, 'batch': "", 'nproc': 1 }
+    else:
+        o = dict(defaults)
+
+    opts, args = getopt.getopt(argv, "", valid)
+    for opt, arg in opts:
+        if opt == "--help":
+            print(usage)
+            sys.exit(0)
+        if opt == "--tags":
+            o['tags'] = arg.split(",")
+        if opt == "--tmin":
+            o['tmin'] = datetime.datetime.strptime(arg,'%Y-%m-%d')
+        if opt == "--tmax":
+            o['tmax'] = datetime.datetime.strptime(arg,'%Y-%m-%d')
+        if opt == "--vmax":
+            o['vmax'] = int(arg)
+        if opt == "--combine":
+            o['combine'] = max(1,int(arg))
+        if opt == "--rolling":
+            o['rolling'] = max(1,int(arg))
+        if opt == "--png":
+            o['png'] = arg
+        if opt == "--batch":
+            o['batch'] = arg
+        if opt == "--nproc":
+            o['nproc'] = max(1,int(arg))
+        if opt in ("--death","--update","--delta","--relative","--logx","--logy","--quiet",
+                   "--nopng","--noplot"):
+            o[opt[2:]] = True
+
+    return o
+
+#---------------------------------------------------------------------------------------------------
+# read the plot jobs from the job file, one line of c19.py plot options per job (# comments)
+#---------------------------------------------------------------------------------------------------
+def read_jobs(job_file,defaults):
+    defaults = dict(defaults,batch="",noplot=True)
+    jobs = []
+    with open(job_file,'r') as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if line == "":
+                continue
+            o = read_options(shlex.split(line),defaults)
+            if o['png'] == defaults['png']:
+                o['png'] = './c19_%03d.png'%(len(jobs))
+            jobs.append(o)
+    return jobs
+
+#---------------------------------------------------------------------------------------------------
+# make one plot from the loaded data (the data are not modified, derived series are shared)
+#---------------------------------------------------------------------------------------------------
+def make_plot(data,o):
+    # want to look at deaths or infections, cummulative or deltas, relative to total population in
+    # percent (all tags at once)
+    value_name = 'Infected'
+    kind = 'infected'
+    if o['death']:
+        value_name = 'Deaths'
+        kind = 'deceased'
+    ops = []
+    if o['rolling'] > 1:
+        ops.append('mean%d'%(o['rolling']))
+    if o['combine'] > 1:
+        ops.append('combine%d'%(o['combine']))
+    if o['delta']:
+        ops.append('delta')
+    if o['relative']:
+        if not o['quiet']:
+            for tag in o['tags']:
+                print(" Area(%s), Population: %d"%(tag,data.population[tag]))
+        ops.append('percent')
+    values = data.derived(kind,*ops)
+
+    # create the data axis points
+    dates = data.derived_dates(*ops)
+    times = pd.DatetimeIndex(dates)
+
+    # cut out relevant sub arrays
+    xmin,xmax = find_xlimits(times,o['tmin'],o['tmax'])
+    if not o['quiet']:
+        print(" %s - %s "%(xmin,xmax))
+    imin,imax = data_ts.date_ids(dates,xmin,xmax)
+    times = pd.DatetimeIndex(times[imin:imax])
+    values = values.days(slice(imin,imax))
+
+    # prepare the plot
+    set_plot_style(o['logx'],o['logy'],o['delta'],value_name,o['relative'],o['combine'])
+
+    # plot
+    for tag in o['tags']:
+        #plt.errorbar(times, values[tag], yerr=np.sqrt(values[tag]), marker='o', label=tag)
+        plt.plot(times, values[tag], marker='o', label=tag)
+
+    if o['vmax'] != 0:
+        ymax = o['vmax']
+        plt.ylim(0,ymax)
+
+    delta = 0.02*(xmax-xmin)
+    plt.xlim(xmin-delta,xmax+delta)
+    plt.legend(frameon=False)
+
+    if not o['nopng']:
+        plt.savefig(o['png'])
+    if not o['noplot']:
+        plt.show()
+    plt.close()
+
+    return o['png']
+
+# data shared with the batch worker processes (set by the pool initializer, also when the workers
+# are spawned instead of forked)
+batch_data = None
+
+def init_batch_worker(data):
+    global batch_data
+    batch_data = data
+    if plt is None:
+        import_plotting(interactive=False)
+    return
+
+def make_batch_plot(o):
+    return make_plot(batch_data,o)
+
+#===================================================================================================
+# MAIN
+#===================================================================================================
+if __name__ == "__main__":
+    options = read_options(sys.argv[1:])
+    quiet = options['quiet']
+
+    jobs = [ options ]
+    if options['batch'] != "":
+        # batch mode: only render the png files, the data are loaded once for all jobs
+        jobs = read_jobs(options['batch'],options)
         if not quiet:
-            print(" Area(%s), Population: %d"%(tag,data.population[tag]))
-        values[tag] = np.array(values[tag]) * (100./float(data.population[tag]))
-       
-# cut out relevant sub arrays
-xmin,xmax = find_xlimits(times,tmin,tmax)
-if not quiet:
-    print(" %s - %s "%(xmin,xmax))
-imin,imax = trim_times_series_ids(xmin,xmax,times)
-times = pd.DatetimeIndex(times[imin:imax])
-for tag in tags:
-    values[tag] = values[tag][imin:imax]
-    
-# prepare the plot
-set_plot_style(logx,logy,delta,value_name)
-
-# plot
-for tag in tags:
-    #plt.errorbar(times, values[tag], yerr=np.sqrt(values[tag]), marker='o', label=tag)
-    plt.plot(times, values[tag], marker='o', label=tag)
-
-if vmax != 0:
-    ymax = vmax
-    plt.ylim(0,ymax)
-
-delta = 0.02*(xmax-xmin)
-plt.xlim(xmin-delta,xmax+delta)
-plt.legend(frameon=False)
-
-if not nopng:
-    plt.savefig('./c19.png')
-if not noplot:
-    plt.show()
-
-sys.exit(0)
+            print(" Batch: %d plot jobs from %s"%(len(jobs),options['batch']))
+
+    # deal with the input data (only the tags and kinds needed by the jobs)
+    tags = []
+    kinds = []
+    for o in jobs:
+        tags += [ tag for tag in o['tags'] if tag not in tags ]
+        kind = 'deceased' if o['death'] else 'infected'
+        if kind not in kinds:
+            kinds.append(kind)
+
+    # plotting only when there is something to show or save (non-interactive backend without show)
+    plots = [ o for o in jobs if not (o['nopng'] and o['noplot']) ]
+    if len(plots) > 0:
+        import_plotting(interactive=not all([ o['noplot'] for o in plots ]))
+
+    data = data_ts.Data_ts("%s/data"%(os.environ.get('KRONE_BASE')))
+    if options['update']:
+        # new files: bring the cache up to date (only new days are read)
+        data.update_files(quiet)
+        data.load_data(quiet)
+    else:
+        data.load_data(quiet,tags=tags,kinds=tuple(kinds))
+    data.summary()
+
+    # all requested tags have to be in the data (also without plotting)
+    for o in jobs:
+        values = data.deceased if o['death'] else data.infected
+        missing = [ tag for tag in o['tags'] if tag not in values ]
+        if len(missing) > 0:
+            print(" ERROR - tags not found in the data: %s"%(",".join(missing)))
+            sys.exit(1)
+
+    if options['batch'] == "":
+        if len(plots) > 0:
+            make_plot(data,options)
+    elif options['nproc'] > 1 and len(plots) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(options['nproc'],len(plots)),init_batch_worker,(data,))
+        try:
+            pngs = pool.map(make_batch_plot,plots,chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        pngs = [ make_plot(data,o) for o in plots ]
+
+    if options['batch'] != "":
+        if not quiet and len(pngs) > 0:
+            print(" Batch: rendered %d plots (%s ... %s)"%(len(pngs),pngs[0],pngs[-1]))
+
+    sys.exit(0)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#---------------------------------------------------------------------------------------------------
+# Local server keeping the COVID-19 time series in memory and answering queries over HTTP.
+#
+#    ./c19_server.py --port=8019 --refresh=3600 &
+#    curl 'http://localhost:8019/series?tags=US,Germany&delta=1&combine=7&tmin=2021-01-01'
+#    curl 'http://localhost:8019/series?tags=Massachusetts&kind=deceased&relative=1&format=csv'
+#
+#---------------------------------------------------------------------------------------------------
+import sys,os,getopt
+# Our stuff
+import data_server
+
+#===================================================================================================
+# MAIN
+#===================================================================================================
+# Define string to explain usage of the script
+usage  = "\nUsage: c19_server.py [ --host=<name> --port=<n> --refresh=<seconds> --noupdate --quiet ]\n"
+valid = ['host=','port=','refresh=','noupdate','quiet','help']
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "", valid)
+except getopt.GetoptError as ex:
+    print(usage)
+    print(str(ex))
+    sys.exit(1)
+
+# read all command line options
+host = "localhost"
+port = 8019
+refresh = 3600
+update = True
+quiet = False
+
+for opt, arg in opts:
+    if opt == "--help":
+        print(usage)
+        sys.exit(0)
+    if opt == "--host":
+        host = arg
+    if opt == "--port":
+        port = int(arg)
+    if opt == "--refresh":
+        refresh = int(arg)
+    if opt == "--noupdate":
+        update = False
+    if opt == "--quiet":
+        quiet = True
+
+server = data_server.Data_server("%s/data"%(os.environ.get('KRONE_BASE')),host,port,refresh,update,
+                                 quiet)
+try:
+    server.serve()
+except KeyboardInterrupt:
+    print(" Data server: stopped")
+
+sys.exit(0)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#---------------------------------------------------------------------------------------------------
+# Startup benchmark of c19.py: wall time of the main command line paths (fresh interpreter each).
+#
+#    ./c19_startup.py --n=5 --max=0.5
+#
+# With --max the benchmark fails (exit code 1) if any path not plotting is slower than max seconds.
+#---------------------------------------------------------------------------------------------------
+import subprocess
+import sys,os,getopt
+import time
+# Our stuff
+import data_ts
+
+# the paths to measure: name, c19.py options, plotting or not
+cases = [ ('help',       ['--help'],                                       False),
+          ('data check', ['--tags=US','--nopng','--noplot','--quiet'],     False),
+          ('png only',   ['--tags=US','--noplot','--quiet','--png=/dev/null'], True) ]
+
+#===================================================================================================
+# MAIN
+#===================================================================================================
+# Define string to explain usage of the script
+usage  = "\nUsage: c19_startup.py [ --n=<repeat> --max=<seconds> ]\n"
+valid = ['n=','max=','help']
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "", valid)
+except getopt.GetoptError as ex:
+    print(usage)
+    print(str(ex))
+    sys.exit(1)
+
+# read all command line options
+n = 5
+tmax = 0
+for opt, arg in opts:
+    if opt == "--help":
+        print(usage)
+        sys.exit(0)
+    if opt == "--n":
+        n = max(1,int(arg))
+    if opt == "--max":
+        tmax = float(arg)
+
+c19 = os.path.join(os.path.dirname(os.path.abspath(__file__)),"c19.py")
+# full load first, so the data cache is written and all measured runs read from it
+data_ts.Data_ts("%s/data"%(os.environ.get('KRONE_BASE'))).load_data(quiet=True)
+
+with open(os.devnull,'w') as devnull:
+
+    failed = False
+    print(" %-12s %8s %8s  (%d runs)"%('path','min','median',n))
+    for name,options,plotting in cases:
+        times = []
+        for i in range(n):
+            start = time.time()
+            rc = subprocess.call([sys.executable,c19]+options,stdout=devnull,stderr=devnull)
+            times.append(time.time()-start)
+            if rc != 0:
+                print(" ERROR - c19.py %s failed (rc=%d)"%(" ".join(options),rc))
+                sys.exit(1)
+        times.sort()
+        print(" %-12s %7.3fs %7.3fs"%(name,times[0],times[len(times)//2]))
+        if tmax > 0 and not plotting and times[len(times)//2] > tmax:
+            print(" ERROR - %s is slower than %.3fs"%(name,tmax))
+            failed = True
+
+sys.exit(1 if failed else 0)
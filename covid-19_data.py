@@ -48,40 +48,6 @@ def find_xlimits(times,tmin,tmax):
         xmax = tmax
     return xmin,xmax
 
-def trim_times_series_ids(tmin,tmax,times):
-
-    # convert date limits into times
-
-    try:
-        tmin = str(tmin.date())
-    except:
-        pass
-
-    try:
-        tmax = str(tmax.date())
-    except:
-        pass
-
-    time_min = datetime.datetime.strptime(tmin,"%Y-%m-%d")
-    time_max = datetime.datetime.strptime(tmax,"%Y-%m-%d")
-
-    # find indices looking into times array
-    imin = -1
-    imax = -1
-    i = 0
-    for time in times:
-        t = datetime.datetime.strptime(str(time)[0:10],"%Y-%m-%d")
-        if imin == -1 and t>=time_min:
-            imin = i
-        if t<=time_max:
-            imax = i
-        if t>time_max:
-            break
-        i += 1
-
-    # return the indices
-    return imin,imax
-
 def update_file(get_cmd,data_url,data_file):
     print " Update the data file: %s"%data_file
     cmd = "%s %s -O data/%s >& /dev/null"%(get_cmd,data_url,data_file)
@@ -295,18 +261,20 @@ if mc:
 ###     values = data.infected
 
 # create the data frames and select the data from our container
-times = pd.DatetimeIndex(times)
+dates = data_ts.parse_dates(times)
+times = pd.DatetimeIndex(dates)
 # cut out relevant sub arrays
 xmin,xmax = find_xlimits(times,tmin,tmax)
-imin,imax = trim_times_series_ids(xmin,xmax,times)
+imin,imax = data_ts.date_ids(dates,xmin,xmax)
 times = times[imin:imax]
 for tag in tags:
     values[tag] = values[tag][imin:imax]
 
 if mc:
-    times_mc = pd.DatetimeIndex(times_mc)
+    dates_mc = data_ts.parse_dates(times_mc)
+    times_mc = pd.DatetimeIndex(dates_mc)
     # cut out relevant sub arrays
-    imin_mc,imax_mc = trim_times_series_ids(tmin,tmax,times_mc)
+    imin_mc,imax_mc = data_ts.date_ids(dates_mc,tmin,tmax)
     times_mc = times_mc[imin_mc:imax_mc]
     for tag in tags:
         values_mc[tag] = values_mc[tag][imin_mc:imax_mc]
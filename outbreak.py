@@ -10,25 +10,39 @@
 #---------------------------------------------------------------------------------------------------
 import sys,os,getopt
 import datetime
-import numpy
 # Our stuff
-import history
-import rgvd
-import pathogen
-import population
+import simulation
+import ensemble
+import parameter
+import scan
+import deterministic
+import metapopulation
+import data_ts
 
 #===================================================================================================
 # MAIN
 #===================================================================================================
 # Define string to explain usage of the script
 usage  = "\nUsage: outbreak.py [ --n_popul=<int> --i_initial=<int> --n_day_max=<int> \
-                                 --reco_mean=<float> --reco_std=<float> --pi_inital=<float>\
+                                 --reco_mean=<float> --reco_std=<float> --pi_initial=<float>\
                                  --pi_decay=<float> --death_rate=<float> --exposure_avg=<float>\
                                  --exposure_std=<float> --seed=<int> --record=<string>\
-                                 --date=<string>]\n"
+                                 --date=<string> --engine=<person|array|cohort>\
+                                 --n_seeds=<int> --n_proc=<int>\
+                                 --scan=<name:min:max[:std],...> --n_points=<int> --n_iter=<int>\
+                                 --tag=<string> --cache=<file>\
+                                 --save=<dir> --save_day=<int> --start=<dir>\
+                                 --checkpoint=<int> --resume --stream\
+                                 --model=<agent|age|sir|seir> --latent=<float>\
+                                 --regions=<tag,...|US> --coupling=<float>\
+                                 --social=<fraction:n_family:n_work:ratio_family,...>\
+                                 --graph=<n_links:n_random:ratio_random>]\n"
 
 valid = ['n_popul=','i_initial=','n_day_max=','reco_mean=','reco_std=','pi_initial=','pi_decay=',
-         'death_rate=','exposure_avg=','exposure_std=','seed=','record=','date=',
+         'death_rate=','exposure_avg=','exposure_std=','seed=','record=','date=','engine=',
+         'n_seeds=','n_proc=','scan=','n_points=','n_iter=','tag=','cache=',
+         'save=','save_day=','start=','checkpoint=','resume','stream',
+         'model=','latent=','regions=','coupling=','social=','graph=',
          'help']
 try:
     opts, args = getopt.getopt(sys.argv[1:], "", valid)
@@ -65,11 +79,29 @@ EXPOSURE_STD = 2
 SEED = 1000
 RECORD = "data/time_series_covid19"
 DATE = "2020-03-31"
+ENGINE = "person"
+N_SEEDS = 1
+N_PROC = 0
+SCAN = []
+N_POINTS = 5
+N_ITER = 0
+TAG = "Massachusetts"
+CACHE = "data/scan_cache.json"
+SAVE = ""
+SAVE_DAY = 0
+START = ""
+CHECKPOINT = 0
+RESUME = False
+STREAM = False
+MODEL = "agent"
+LATENT = 0.
+REGIONS = []
+COUPLING = 0.
+SOCIAL = None
+GRAPH = None
 
 R_UNKNOWN = 4
 
-date_s = datetime.datetime.strptime(DATE, "%Y-%m-%d")
-
 # read all command line options
 for opt, arg in opts:
     if opt == "--help":
@@ -85,11 +117,15 @@ for opt, arg in opts:
         N_DAYS = int(arg)
     if opt == "--reco_mean":
         RECO_MEAN = float(arg)
+    if opt == "--reco_std":
+        RECO_STD = float(arg)
     if opt == "--pi_initial":
         PI_INITIAL = float(arg)
     if opt == "--pi_decay":
         PI_DECAY = float(arg)
-    if opt == "--exposure_mean":
+    if opt == "--death_rate":
+        DEATH_RATE = float(arg)
+    if opt == "--exposure_avg":
         EXPOSURE_AVG = int(arg)
     if opt == "--exposure_std":
         EXPOSURE_STD = int(arg)
@@ -99,56 +135,160 @@ for opt, arg in opts:
         DATE = arg
     if opt == "--record":
         RECORD = arg
+    if opt == "--engine":
+        ENGINE = arg
+    if opt == "--n_seeds":
+        N_SEEDS = int(arg)
+    if opt == "--n_proc":
+        N_PROC = int(arg)
+    if opt == "--scan":
+        for spec in arg.split(","):
+            f = spec.split(":")
+            vmin,vmax = float(f[1]),float(f[2])
+            std = (vmax-vmin)/4.
+            if len(f) > 3:
+                std = float(f[3])
+            SCAN.append(parameter.Parameter(f[0],f[0],(vmin+vmax)/2.,std,vmin,vmax))
+    if opt == "--n_points":
+        N_POINTS = int(arg)
+    if opt == "--n_iter":
+        N_ITER = int(arg)
+    if opt == "--tag":
+        TAG = arg
+    if opt == "--cache":
+        CACHE = arg
+    if opt == "--save":
+        SAVE = arg
+    if opt == "--save_day":
+        SAVE_DAY = int(arg)
+    if opt == "--start":
+        START = arg
+    if opt == "--checkpoint":
+        CHECKPOINT = int(arg)
+    if opt == "--resume":
+        RESUME = True
+    if opt == "--stream":
+        STREAM = True
+    if opt == "--model":
+        MODEL = arg
+    if opt == "--latent":
+        LATENT = float(arg)
+    if opt == "--regions":
+        REGIONS = arg.split(",")
+    if opt == "--coupling":
+        COUPLING = float(arg)
+    if opt == "--social":
+        SOCIAL = []
+        for social in arg.split(","):
+            f = social.split(":")
+            SOCIAL.append((float(f[0]),int(f[1]),int(f[2]),float(f[3])))
+    if opt == "--graph":
+        f = arg.split(":")
+        GRAPH = (int(f[0]),int(f[1]),float(f[2]))
+
+# resume from the last checkpoint of the record (if there is one)
+if RESUME:
+    if os.path.exists(simulation.checkpoint_dir(RECORD)):
+        START = simulation.checkpoint_dir(RECORD)
+    else:
+        print " No checkpoint to resume from: %s (start from scratch)"%\
+            (simulation.checkpoint_dir(RECORD))
+
+# snapshots only exist for the array population
+if (SAVE != "" or START != "" or CHECKPOINT > 0) and ENGINE != "array":
+    print " ERROR - snapshots (--save, --start, --checkpoint) need --engine=array"
+    sys.exit(1)
+
+# the contact graph is made for the array population
+if GRAPH is not None and ENGINE != "array":
+    print " ERROR - the contact graph (--graph) needs --engine=array"
+    sys.exit(1)
+
+# an ensemble runs each seed plainly with the agent engines
+if N_SEEDS > 1 and (len(SCAN) > 0 or SAVE != "" or CHECKPOINT > 0 or STREAM or MODEL != "agent"):
+    print " ERROR - an ensemble (--n_seeds) can not be combined with --scan, --save, --checkpoint,"+\
+        " --stream or --model"
+    sys.exit(1)
+
+# regions of the metapopulation: US states (US means all of them) or countries, not mixed, each
+# region is a cohort population run once
+if len(REGIONS) > 0:
+    if N_SEEDS > 1 or ENGINE not in ("person","cohort"):
+        print " ERROR - --regions runs one cohort population per region, it takes no --n_seeds and"+\
+            " no other --engine"
+        sys.exit(1)
+    states,countries = metapopulation.read_populations("data")
+    if REGIONS == ['US']:
+        REGIONS = sorted([ region for region in states if states[region] > 0 ])
+        if len(REGIONS) == 0:
+            print " ERROR - no US states found, --regions=US needs the JHU US files in data/"
+            sys.exit(1)
+    missing = [ region for region in REGIONS if region not in states and region not in countries ]
+    if len(missing) > 0:
+        print " ERROR - no population for the regions: %s"%(",".join(missing))
+        if len(states) == 0:
+            print "         (US states need the JHU US files in data/)"
+        sys.exit(1)
+    US_REGIONS = all([ region in states for region in REGIONS ])
+    if not US_REGIONS and any([ region not in countries for region in REGIONS ]):
+        print " ERROR - US states and countries can not be mixed in --regions"
+        sys.exit(1)
+    populations = countries
+    if US_REGIONS:
+        populations = states
+    REGIONS = [ (region,populations[region]) for region in REGIONS ]
 
 # Propagate input
 
-corona = pathogen.Pathogen(rgvd.Rgvd(RECO_MEAN,RECO_STD,1),PI_INITIAL,PI_DECAY,DEATH_RATE)
-social_type = population.Social_type(rgvd.Rgvd(EXPOSURE_AVG,EXPOSURE_STD,1),4,200,0.1)
-numpy.random.seed(seed=int(SEED))
-
-# Generate the population
-
-id = 0
-popul = population.Population()
-
-while (popul.n()<N_POPULATION):
-    p = population.Person(id,social_type)
-    popul.add_person(p)
-
-    id += 1 # increase index for the next person
-print "Day: %d  == %s"%(-1, popul.summary())
-
-# Generate an infection in the healthy population
-n = popul.n()
-while (popul.i() < I_INITIAL * 4):
-    id = numpy.random.randint(0,n)
-    popul.infect(id,corona)
-print "Day: %d == %s"%(0, popul.summary())
-
-# Propagate our spreading model
-i_days = 0
-history = history.History(RECORD)
-today = date_s
-
-print " Corona virus: %s"%(corona.summary())
-while (i_days<N_DAYS):
-
-    # record history
-    history.add_day(today,len(popul.infected),len(popul.recovered),len(popul.deceased))
-    print "Day: %d (%s) == %s"%(i_days, today, popul.summary())
-    
-    # spread and check whether it is still active
-    popul.spread(corona)
-
-    # increase the day
-    i_days += 1
-    today = today + datetime.timedelta(days=1)
-    if not popul.is_active(today,i_days):
-        history.add_day(today,len(popul.infected),len(popul.recovered),len(popul.deceased))
-        history.write()
-        sys.exit(0)
+sim = simulation.Simulation(N_POPULATION,I_INITIAL,N_DAYS,RECO_MEAN,RECO_STD,PI_INITIAL,PI_DECAY,
+                            DEATH_RATE,EXPOSURE_AVG,EXPOSURE_STD,DATE,ENGINE,R_UNKNOWN,START,
+                            SOCIAL,GRAPH)
+
+# scanned parameters have to be numerical parameters of the simulation
+unknown = scan.unknown_parameters(sim,SCAN)
+if len(unknown) > 0:
+    print " ERROR - unknown or unused simulation parameters in --scan: %s"%(",".join(unknown))
+    sys.exit(1)
+
+# metapopulation of many regions (cohorts per region) in one run, one row per region
+if len(REGIONS) > 0:
+    meta = metapopulation.Metapopulation(sim,REGIONS,COUPLING,US_REGIONS)
+    print meta.summary()
+    meta.run(SEED)
+    meta.write(RECORD)
+    sys.exit(0)
+
+# Monte Carlo ensemble of several seeds on all cores, aggregated into one record
+if N_SEEDS > 1:
+    ens = ensemble.Ensemble(sim,range(SEED,SEED+N_SEEDS),N_PROC)
+    print ens.summary()
+    ens.run(RECORD)
+    ens.write(RECORD)
+    sys.exit(0)
+
+# parameter scan (grid or adaptive) comparing to the JHU data of the given tag
+if len(SCAN) > 0:
+    data = data_ts.Data_ts("data")
+    data.load_data()
+    dates = [ datetime.datetime.strptime(t,"%m/%d/%y") for t in data.times ]
+    fit = scan.Scan(sim,SCAN,dates,data.infected[TAG],SEED,CACHE,N_PROC,MODEL,LATENT)
+    if N_ITER > 0:
+        point,chi2 = fit.adaptive(N_ITER)
+    else:
+        point,chi2 = fit.grid(N_POINTS)
+    for point in sorted(fit.results):
+        print " %s -> Chi2: %f"%(point,fit.results[point])
+    print fit.summary()
+    print " Best Chi2: %f"%(chi2)
+    sys.exit(0)
 
+# deterministic compartmental model instead of the agent simulation
+if MODEL != "agent":
+    model = deterministic.from_simulations([sim],MODEL,LATENT)
+    print model.summary()
+    model.histories(RECORD)[0].write()
+    sys.exit(0)
 
-# completed all steps of the simulation but pathogen is still active
-print "Day: %d (%s) == %s"%(i_days, today, popul.summary())
+# single run
+history = sim.run(SEED,RECORD,save=SAVE,save_day=SAVE_DAY,checkpoint=CHECKPOINT,stream=STREAM)
 history.write()
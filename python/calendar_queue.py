@@ -0,0 +1,77 @@
+import os
+import numpy
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Calendar_queue()
+
+     Ids filed under a future day (one bucket per day), for example infected people under the day
+     they recover or die. Filing and taking out the bucket of a day only cost the number of ids
+     involved, nobody else is touched. Entries are not removed when plans change (ex. a person is
+     infected again), the user checks whether the ids of a bucket are still valid.
+
+        buckets - ids per day (day -> list of ids and id arrays)
+
+"""
+class Calendar_queue:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self):
+        self.buckets = {}
+
+    def __len__(self):
+        return sum([ len(numpy.hstack(bucket)) for bucket in self.buckets.values() ])
+
+    #-----------------------------------------------------------------------------------------------
+    # file one id under the given day
+    #-----------------------------------------------------------------------------------------------
+    def add(self,day,id):
+        self.buckets.setdefault(int(day),[]).append(id)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # file many ids, each under its day, in one go
+    #-----------------------------------------------------------------------------------------------
+    def add_many(self,days,ids):
+        if len(ids) == 0:
+            return
+        order = numpy.argsort(days,kind='mergesort')
+        days = numpy.asarray(days)[order]
+        ids = numpy.asarray(ids)[order]
+        starts = numpy.concatenate(([0],numpy.flatnonzero(numpy.diff(days))+1))
+        for day,ids_day in zip(days[starts],numpy.split(ids,starts[1:])):
+            self.buckets.setdefault(int(day),[]).append(ids_day)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # take out all ids filed under the given day
+    #-----------------------------------------------------------------------------------------------
+    def pop(self,day):
+        bucket = self.buckets.pop(int(day),[])
+        if len(bucket) == 0:
+            return numpy.zeros(0,dtype=numpy.int32)
+        return numpy.hstack(bucket).astype(numpy.int32)
+
+    #-----------------------------------------------------------------------------------------------
+    # save to <directory>/<name>_days.npy and <name>_ids.npy and load from there
+    #-----------------------------------------------------------------------------------------------
+    def save(self,directory,name):
+        days = []
+        ids = []
+        for day,bucket in self.buckets.items():
+            bucket = numpy.hstack(bucket).astype(numpy.int32)
+            days.append(numpy.full(len(bucket),day,dtype=numpy.int32))
+            ids.append(bucket)
+        if len(ids) == 0:
+            days = ids = [ numpy.zeros(0,dtype=numpy.int32) ]
+        numpy.save(os.path.join(directory,"%s_days.npy"%(name)),numpy.concatenate(days))
+        numpy.save(os.path.join(directory,"%s_ids.npy"%(name)),numpy.concatenate(ids))
+        return
+
+    def load(self,directory,name):
+        self.buckets = {}
+        self.add_many(numpy.load(os.path.join(directory,"%s_days.npy"%(name))),
+                      numpy.load(os.path.join(directory,"%s_ids.npy"%(name))))
+        return
@@ -0,0 +1,147 @@
+import numpy
+# Our stuff
+from population import Population
+
+#---------------------------------------------------------------------------------------------------
+# probability of an infection being over at the end of each infection age day when it lasted
+# until then (the last age ends all infections)
+#---------------------------------------------------------------------------------------------------
+def hazards(corona):
+    duration = corona.avg_duration
+    n_ages = int(duration.mean+10*duration.std)+2
+    # done at age a = max(floor(duration)-1,0), so below 2 on day 0 and in [a+1,a+2) later
+    cdf = duration.cdf(numpy.arange(2,n_ages+2))
+    p_done = numpy.diff(numpy.concatenate(([0.],cdf)))
+    p_left = 1.-numpy.concatenate(([0.],cdf[:-1]))
+    hazard = numpy.where(p_left > 0,p_done/numpy.maximum(p_left,1e-300),1.)
+    hazard[-1] = 1.
+    return numpy.clip(hazard,0.,1.)
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Population_cohort()
+
+     Population without person identities: the infected are counted per infection age cohort
+     (days since infection) and each day all transitions are drawn at once from binomial
+     distributions (tau leaping with one day steps), so a day costs the same for any population
+     size. It follows the rules of the agent populations with the same Pathogen and Social_types:
+
+      - every infected person has the integer part of avg_contact contacts per day (contacts with
+        oneself do not count), the contacts are spread evenly over the population (well mixed, no
+        families or work groups getting saturated) and infect susceptible people with the
+        probability pi of the Pathogen at their days infected (0, as in the agent populations)
+      - new infections count from the next day on, the infection is over at the end of the day
+        given by the duration of the Pathogen (see population.done_day), then people die with the
+        death rate of the Pathogen or recover
+
+        size         - number of people
+        social_types - list of (number of people, Social_type)
+        s_count      - number of susceptible people
+        infected     - number of infected people per infection age (day 0 is the first day)
+        r_count      - number of recovered people
+        d_count      - number of deceased people
+        day          - number of days spread so far
+
+"""
+class Population_cohort(Population):
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self):
+        self.size = 0
+        self.social_types = []
+        self.s_count = 0
+        self.infected = numpy.zeros(1,dtype=numpy.int64)
+        self.r_count = 0
+        self.d_count = 0
+        self.day = 0
+        self.hazard = None
+        self.contacts_avg = 0.
+
+    #-----------------------------------------------------------------------------------------------
+    # add n susceptible people of the given social type
+    #-----------------------------------------------------------------------------------------------
+    def add_people(self,n,social_type):
+        self.social_types.append((n,social_type))
+        self.size += n
+        self.s_count += n
+        return
+
+    def add_person(self,person):
+        self.add_people(1,person.social_type)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # infect susceptible people from today on (the id does not matter)
+    #-----------------------------------------------------------------------------------------------
+    def infect(self,id,corona):
+        self.infect_many(1)
+        return
+
+    def infect_many(self,n):
+        n = max(min(n,self.s_count),0)
+        self.s_count -= n
+        self.infected[0] += n
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # average number of contacts per infected person and day (population average)
+    #-----------------------------------------------------------------------------------------------
+    def contacts(self):
+        contacts = 0.
+        for n,st in self.social_types:
+            contacts += n * st.mean_contacts()
+        return contacts/self.size
+
+    #-----------------------------------------------------------------------------------------------
+    # Spread for one day: exposures by all infected, then the infections that are over
+    #-----------------------------------------------------------------------------------------------
+    def spread(self,corona):
+
+        if self.hazard is None:
+            self.hazard = hazards(corona)
+            self.contacts_avg = self.contacts()
+        if len(self.infected) < len(self.hazard):
+            infected = numpy.zeros(len(self.hazard),dtype=numpy.int64)
+            infected[:len(self.infected)] = self.infected
+            self.infected = infected
+
+        # each susceptible gets Poisson distributed contacts with the infected
+        n_infected = int(self.infected.sum())
+        p_infect = 1.-numpy.exp(-n_infected*self.contacts_avg*corona.pi(0)/self.size)
+        new = numpy.random.binomial(self.s_count,p_infect)
+
+        # infections over today, die or recover
+        done = numpy.random.binomial(self.infected,self.hazard)
+        n_done = int(done.sum())
+        dead = numpy.random.binomial(n_done,corona.death_rate)
+
+        # next day: everybody one day older, the new infections start at day 0
+        self.infected[1:] = self.infected[:-1] - done[:-1]
+        self.infected[0] = new
+        self.s_count -= new
+        self.r_count += n_done - dead
+        self.d_count += dead
+        self.day += 1
+
+        return
+
+    def i(self):
+        return int(self.infected.sum())
+
+    def n(self):
+        return self.size
+
+    def r(self):
+        return self.r_count
+
+    def d(self):
+        return self.d_count
+
+    def show(self):
+        print("##\n Population of %d people (infected: %d)"%(self.n(),self.i()))
+        for age,count in enumerate(self.infected):
+            if count > 0:
+                print(" Cohort: day %3d - %d infected"%(age,count))
+        return
@@ -0,0 +1,137 @@
+import os
+import numpy
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Compartment()
+
+     Set of person ids (for example all infected people) with constant time insertion and removal.
+     The ids are kept compact at the front of the members array, a removed id is replaced by the
+     last member (swap-remove), and the position array remembers where each id is stored.
+
+        members  - ids in the compartment (first size entries are valid)
+        position - position of each id in members (-1 if not in the compartment)
+        size     - number of ids in the compartment
+
+"""
+class Compartment:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,n=0):
+        self.members = numpy.zeros(0,dtype=numpy.int32)
+        self.position = numpy.zeros(0,dtype=numpy.int32)
+        self.size = 0
+        self.reserve(n)
+
+    #-----------------------------------------------------------------------------------------------
+    # make sure ids up to n can be stored (capacity grows by doubling)
+    #-----------------------------------------------------------------------------------------------
+    def reserve(self,n):
+        capacity = len(self.position)
+        if n <= capacity:
+            return
+        capacity = max(n,2*capacity)
+        position = numpy.empty(capacity,dtype=numpy.int32)
+        position[:len(self.position)] = self.position
+        position[len(self.position):] = -1
+        self.position = position
+        return
+
+    def reserve_members(self,n):
+        capacity = len(self.members)
+        if n <= capacity:
+            return
+        members = numpy.zeros(max(n,2*capacity),dtype=numpy.int32)
+        members[:self.size] = self.members[:self.size]
+        self.members = members
+        return
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self,id):
+        return id < len(self.position) and self.position[id] >= 0
+
+    #-----------------------------------------------------------------------------------------------
+    # ids in the compartment (a view, take a copy when changing the compartment while using it)
+    #-----------------------------------------------------------------------------------------------
+    def ids(self):
+        return self.members[:self.size]
+
+    #-----------------------------------------------------------------------------------------------
+    # add one id (nothing happens if it is already in)
+    #-----------------------------------------------------------------------------------------------
+    def add(self,id):
+        self.reserve(id+1)
+        if self.position[id] >= 0:
+            return
+        self.reserve_members(self.size+1)
+        self.members[self.size] = id
+        self.position[id] = self.size
+        self.size += 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # remove one id (nothing happens if it is not in)
+    #-----------------------------------------------------------------------------------------------
+    def remove(self,id):
+        if id not in self:
+            return
+        i = self.position[id]
+        last = self.members[self.size-1]
+        self.members[i] = last
+        self.position[last] = i
+        self.position[id] = -1
+        self.size -= 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # add many unique ids in one go (ids already in are skipped)
+    #-----------------------------------------------------------------------------------------------
+    def add_many(self,ids):
+        if len(ids) == 0:
+            return
+        self.reserve(int(ids.max())+1)
+        ids = ids[self.position[ids] < 0]
+        n = len(ids)
+        self.reserve_members(self.size+n)
+        self.members[self.size:self.size+n] = ids
+        self.position[ids] = numpy.arange(self.size,self.size+n,dtype=numpy.int32)
+        self.size += n
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # remove many unique ids in one go, the cost only depends on the number of removed ids
+    #-----------------------------------------------------------------------------------------------
+    def remove_many(self,ids):
+        ids = ids[ids < len(self.position)]
+        ids = ids[self.position[ids] >= 0]
+        if len(ids) == 0:
+            return
+        size = self.size - len(ids)
+        # holes left in the part that is kept, and surviving members beyond it to fill them
+        holes = self.position[ids]
+        holes = holes[holes < size]
+        self.position[ids] = -1
+        tail = self.members[size:self.size]
+        tail = tail[self.position[tail] >= 0]
+        self.members[holes] = tail
+        self.position[tail] = holes
+        self.size = size
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # save to <directory>/<name>_*.npy and load from there (memory mapped, copy on write by default)
+    #-----------------------------------------------------------------------------------------------
+    def save(self,directory,name):
+        numpy.save(os.path.join(directory,"%s_members.npy"%(name)),self.members[:self.size])
+        numpy.save(os.path.join(directory,"%s_position.npy"%(name)),self.position)
+        return
+
+    def load(self,directory,name,mmap_mode='c'):
+        self.members = numpy.load(os.path.join(directory,"%s_members.npy"%(name)),mmap_mode)
+        self.position = numpy.load(os.path.join(directory,"%s_position.npy"%(name)),mmap_mode)
+        self.size = len(self.members)
+        return
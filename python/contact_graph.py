@@ -0,0 +1,161 @@
+import os
+import numpy
+
+#---------------------------------------------------------------------------------------------------
+# index pointer of rows with the given number of entries (int32 as long as it fits)
+#---------------------------------------------------------------------------------------------------
+def row_pointer(degree):
+    indptr = numpy.zeros(len(degree)+1,dtype=numpy.int64)
+    numpy.cumsum(degree,out=indptr[1:])
+    if indptr[-1] < 2**31:
+        indptr = indptr.astype(numpy.int32)
+    return indptr
+
+#---------------------------------------------------------------------------------------------------
+# offsets to the other members of a group of the given size: everybody in the group, or the n_links
+# neighbours on a ring through the group if the group is larger than that
+#---------------------------------------------------------------------------------------------------
+def group_offsets(size,n_links):
+    if size-1 <= n_links:
+        return numpy.arange(1,size)
+    k = numpy.arange((n_links//2)*2)
+    return (k//2+1)*(1-2*(k%2))
+
+#---------------------------------------------------------------------------------------------------
+# layer of groups, groups is a list of (ids, group size) with the ids in group order (consecutive
+# groups of the size, the last one may be smaller), filled in chunks of positions
+#---------------------------------------------------------------------------------------------------
+def group_layer(n,groups,n_links,chunk=1<<18):
+    degree = numpy.zeros(n,dtype=numpy.int32)
+    for ids,size in groups:
+        last = len(ids) - len(ids) % size
+        degree[ids[:last]] = len(group_offsets(size,n_links))
+        degree[ids[last:]] = len(group_offsets(len(ids)-last,n_links))
+    indptr = row_pointer(degree)
+    indices = numpy.zeros(int(indptr[-1]),dtype=numpy.int32)
+
+    for ids,size in groups:
+        last = len(ids) - len(ids) % size
+        for first in range(0,len(ids),chunk):
+            position = numpy.arange(first,min(first+chunk,len(ids)))
+            start = position - position % size
+            # all members of complete groups have the same offsets, the last group its own
+            for group_size,members in ((size,position < last),(len(ids)-last,position >= last)):
+                offsets = group_offsets(group_size,n_links)
+                if len(offsets) == 0 or not members.any():
+                    continue
+                p = position[members,None]
+                s = start[members,None]
+                rows = indptr[ids[position[members]]][:,None] + numpy.arange(len(offsets))
+                indices[rows] = ids[s + (p-s+offsets) % group_size]
+    return indptr,indices
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Contact_graph(n_links=20,n_random=10,ratio_random=0.1)
+
+     Fixed contact network of a Population_array in compressed sparse rows (the neighbours of id
+     are indices[indptr[id]:indptr[id+1]], int32 ids), one network per layer:
+
+        household - everybody in the same household (n_family people of one social type)
+        work      - colleagues in the same workplace (n_work people of one social type, randomly
+                    picked), at most n_links of them on a ring through the workplace
+        random    - n_random people anywhere in the population (acquaintances of the person, not
+                    necessarily the other way round)
+
+     Each day an infected person has the contacts of its Social_type, each of them in the household
+     (ratio_family), otherwise randomly (ratio_random) or at work, and meets a random neighbour of
+     that layer. All contacts of a day are drawn at once by gathering from the rows of the infected
+     people. Households and workplaces do not overlap, unlike the id offsets of the Social_type.
+
+        n_links      - maximum number of colleagues per person
+        n_random     - number of random acquaintances per person
+        ratio_random - ratio of the contacts outside of the household that are random
+        layers       - (indptr, indices) per layer (after build or load)
+
+"""
+class Contact_graph:
+
+    layer_names = ('household','work','random')
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,n_links=20,n_random=10,ratio_random=0.1):
+        self.n_links = n_links
+        self.n_random = n_random
+        self.ratio_random = ratio_random
+        self.layers = {}
+
+    def summary(self):
+        summary = " Contact_graph: n_links=%d, n_random=%d, ratio_random=%f"%\
+            (self.n_links,self.n_random,self.ratio_random)
+        for name in self.layer_names:
+            if name in self.layers:
+                summary += ", %s=%d"%(name,len(self.layers[name][1]))
+        return summary
+
+    #-----------------------------------------------------------------------------------------------
+    # build all layers for the people of the population (social type index per id)
+    #-----------------------------------------------------------------------------------------------
+    def build(self,social,social_types):
+        n = len(social)
+        social = numpy.asarray(social)
+
+        # households of consecutive ids, workplaces of random ids (of the same social type)
+        households = []
+        workplaces = []
+        for index,social_type in enumerate(social_types):
+            ids = numpy.flatnonzero(social == index).astype(numpy.int32)
+            households.append((ids,social_type.n_family))
+            workplaces.append((numpy.random.permutation(ids),social_type.n_work))
+        self.layers['household'] = group_layer(n,households,n)
+        self.layers['work'] = group_layer(n,workplaces,self.n_links)
+
+        # random acquaintances (meeting oneself infects nobody)
+        self.layers['random'] = (row_pointer(numpy.full(n,self.n_random,dtype=numpy.int32)),
+                                 numpy.random.randint(0,n,n*self.n_random,dtype=numpy.int32))
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # contacts of today of the given people with the given social type (ids of the contacts)
+    #-----------------------------------------------------------------------------------------------
+    def contacts(self,ids,social_type):
+
+        # how many encounters today? (negative numbers mean no encounter)
+        n_contacts = numpy.maximum(social_type.avg_contact.sample(len(ids)).astype(int),0)
+        sources = numpy.repeat(ids,n_contacts)
+
+        # layer of each contact, then a random neighbour in the row of that layer
+        u = numpy.random.uniform(0,1,len(sources))
+        layer = numpy.where(u < social_type.ratio_family,0,
+                            numpy.where(numpy.random.uniform(0,1,len(sources)) < self.ratio_random,
+                                        2,1))
+        targets = []
+        for index,name in enumerate(self.layer_names):
+            indptr,indices = self.layers[name]
+            rows = sources[layer == index]
+            first = indptr[rows].astype(numpy.int64)
+            degree = indptr[rows+1] - first
+            pick = first + (numpy.random.uniform(0,1,len(rows))*degree).astype(numpy.int64)
+            targets.append(indices[pick[degree > 0]])
+        return numpy.concatenate(targets)
+
+    #-----------------------------------------------------------------------------------------------
+    # save the layers to <directory>/graph_<layer>_indptr.npy and _indices.npy and load from there
+    # (memory mapped, the graph is never changed)
+    #-----------------------------------------------------------------------------------------------
+    def save(self,directory):
+        for name in self.layer_names:
+            indptr,indices = self.layers[name]
+            numpy.save(os.path.join(directory,"graph_%s_indptr.npy"%(name)),indptr)
+            numpy.save(os.path.join(directory,"graph_%s_indices.npy"%(name)),indices)
+        return
+
+    def load(self,directory,mmap_mode='r'):
+        for name in self.layer_names:
+            self.layers[name] = \
+                (numpy.load(os.path.join(directory,"graph_%s_indptr.npy"%(name)),mmap_mode),
+                 numpy.load(os.path.join(directory,"graph_%s_indices.npy"%(name)),mmap_mode))
+        return
+
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+try:
+    from http.server import BaseHTTPRequestHandler,HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse,parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler,HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse,parse_qs
+# Our stuff
+import data_ts
+
+#---------------------------------------------------------------------------------------------------
+# the HTTP server, one thread per connection
+#---------------------------------------------------------------------------------------------------
+class Threading_http_server(ThreadingMixIn,HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+#---------------------------------------------------------------------------------------------------
+# request handler, all answers come from the Data_server attached to the HTTP server
+#---------------------------------------------------------------------------------------------------
+class Request_handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True       # small answers on kept alive connections go out at once
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict([ (key,values[-1]) for key,values in parse_qs(url.query).items() ])
+        code,content_type,body = self.server.data_server.query(url.path,params)
+        body = body.encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type",content_type)
+        self.send_header("Content-Length",str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    def log_message(self,format,*args):
+        if not self.server.data_server.quiet:
+            BaseHTTPRequestHandler.log_message(self,format,*args)
+        return
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Data_server(data_dir="data",host="localhost",port=8019,refresh=3600,update=True,quiet=False)
+
+     Local HTTP server keeping the Data_ts resident in memory, so tools get the time series without
+     parsing the files again. The data are refreshed in the background every refresh seconds (only
+     new days are read) and a refreshed Data_ts replaces the old one in one go, so queries never
+     wait for a refresh. Queries (GET):
+
+        /tags                          - all tags and the date range
+        /status                        - date range, number of tags and time of the last refresh
+        /series?tags=X,Y&kind=deceased&delta=1&relative=1&rolling=7&combine=7
+               &tmin=%Y-%m-%d&tmax=%Y-%m-%d&format=csv
+                                       - the series (JSON unless format=csv, kind infected by
+                                         default), the derived series are cached by Data_ts
+
+        data_dir - directory of the data files
+        host     - host name to listen on (localhost only by default)
+        port     - port to listen on (0 -> any free port, set when serving)
+        refresh  - seconds between refreshes (0 -> no refresh)
+        update   - download new versions of the files before each refresh
+        quiet    - no printout of the refreshes and requests
+
+"""
+class Data_server:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,data_dir="data",host="localhost",port=8019,refresh=3600,update=True,
+                 quiet=False):
+        self.data_dir = data_dir
+        self.host = host
+        self.port = port
+        self.refresh = refresh
+        self.update = update
+        self.quiet = quiet
+        self.data = None
+        self.loaded = 0
+        self.stop = threading.Event()
+        self.server = None
+
+    #-----------------------------------------------------------------------------------------------
+    # load the data (from the cache if it is valid) into a new Data_ts and swap it in
+    #-----------------------------------------------------------------------------------------------
+    def load(self):
+        data = data_ts.Data_ts(self.data_dir)
+        data.load_data(self.quiet)
+        self.data = data
+        self.loaded = time.time()
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # download new versions of the files and reload if any of them changed
+    #-----------------------------------------------------------------------------------------------
+    def refresh_data(self):
+        if self.update:
+            status = self.data.update_files(self.quiet)
+            if "updated" not in status.values():
+                return False
+        self.load()
+        return True
+
+    def refresh_loop(self):
+        while not self.stop.wait(self.refresh):
+            try:
+                self.refresh_data()
+            except Exception as ex:
+                print(" ERROR - refresh failed: %s"%(str(ex)))
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # answer one query, returns the HTTP code, the content type and the body
+    #-----------------------------------------------------------------------------------------------
+    def query(self,path,params):
+        data = self.data
+        try:
+            if path == "/tags":
+                body = { 'tags': self.tags(data),
+                         'tmin': str(data.dates[0]), 'tmax': str(data.dates[-1]) }
+            elif path == "/status":
+                body = { 'tmin': str(data.dates[0]), 'tmax': str(data.dates[-1]),
+                         'n_tags': len(self.tags(data)), 'loaded': self.loaded }
+            elif path == "/series":
+                return self.series(data,params)
+            else:
+                return self.error(404,"unknown query: %s"%(path))
+        except (KeyError,ValueError) as ex:
+            return self.error(400,"bad query: %s"%(str(ex)))
+        return 200,"application/json",json.dumps(body)
+
+    def error(self,code,message):
+        return code,"application/json",json.dumps({ 'error': message })
+
+    def tags(self,data):
+        tags = list(data.infected.keys())
+        tags += [ tag for tag in data.deceased.keys() if tag not in data.infected ]
+        return tags
+
+    #-----------------------------------------------------------------------------------------------
+    # the requested series of the given tags (same options as c19.py)
+    #-----------------------------------------------------------------------------------------------
+    def series(self,data,params):
+        tags = [ tag for tag in params.get('tags',"").split(",") if tag != "" ]
+        kind = params.get('kind','infected')
+        if kind not in ('infected','deceased'):
+            return self.error(400,"unknown kind: %s"%(kind))
+
+        ops = []
+        if int(params.get('rolling',1)) > 1:
+            ops.append('mean%d'%(int(params['rolling'])))
+        if int(params.get('combine',1)) > 1:
+            ops.append('combine%d'%(int(params['combine'])))
+        if params.get('delta','0') not in ('0','false',''):
+            ops.append('delta')
+        if params.get('relative','0') not in ('0','false',''):
+            ops.append('percent')
+
+        values = data.derived(kind,*ops)
+        missing = [ tag for tag in tags if tag not in values ]
+        if len(missing) > 0:
+            return self.error(404,"unknown tags: %s"%(",".join(missing)))
+
+        dates = data.derived_dates(*ops)
+        imin,imax = data_ts.date_ids(dates,params.get('tmin',0),params.get('tmax',0))
+        dates = [ str(date) for date in dates[imin:imax] ]
+        rows = [ values[tag][imin:imax].tolist() for tag in tags ]
+
+        if params.get('format','json') == 'csv':
+            lines = [ ",".join(['date']+tags) ]
+            for i,date in enumerate(dates):
+                lines.append(",".join([date]+[ "%g"%(row[i]) for row in rows ]))
+            return 200,"text/csv","\n".join(lines)+"\n"
+
+        body = { 'kind': kind, 'ops': ops, 'dates': dates, 'values': dict(zip(tags,rows)) }
+        return 200,"application/json",json.dumps(body)
+
+    #-----------------------------------------------------------------------------------------------
+    # load the data and serve until shutdown (refreshes run in a background thread)
+    #-----------------------------------------------------------------------------------------------
+    def serve(self):
+        if self.update:
+            self.data = data_ts.Data_ts(self.data_dir)
+            self.data.update_files(self.quiet)
+        self.load()
+
+        server = Threading_http_server((self.host,self.port),Request_handler)
+        server.data_server = self
+        self.port = server.server_address[1]
+        self.server = server
+        if self.refresh > 0:
+            thread = threading.Thread(target=self.refresh_loop)
+            thread.daemon = True
+            thread.start()
+        if not self.quiet:
+            print(" Data server: http://%s:%d (refresh every %d sec)"%(self.host,self.port,
+                                                                       self.refresh))
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop.set()
+            self.server.server_close()
+        return
+
+    def shutdown(self):
+        self.stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+        return
@@ -2,7 +2,194 @@
 #
 #---------------------------------------------------------------------------------------------------
 import csv
+import datetime
+import json
 import sys,os
+import time
+import numpy as np
+from contextlib import closing
+from multiprocessing.pool import ThreadPool
+try:
+    from urllib.request import Request,urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import Request,urlopen,HTTPError
+
+#---------------------------------------------------------------------------------------------------
+# string of a value read from the cache, which may have been written by python 2 (byte strings) or
+# python 3 (unicode strings)
+#---------------------------------------------------------------------------------------------------
+def cache_str(value):
+    if isinstance(value,str):
+        return str(value)
+    if isinstance(value,bytes):
+        return value.decode('utf-8')
+    return value.encode('utf-8')
+
+#---------------------------------------------------------------------------------------------------
+# parse the dates of the time series files (JHU: 1/22/20, simulation: 2020-03-31 00:00:00)
+#---------------------------------------------------------------------------------------------------
+def parse_dates(times):
+    dates = []
+    for t in times:
+        try:
+            dates.append(datetime.datetime.strptime(t,"%m/%d/%y").date())
+        except ValueError:
+            dates.append(datetime.datetime.strptime(t[0:10],"%Y-%m-%d").date())
+    return np.array(dates,dtype='datetime64[D]')
+
+#---------------------------------------------------------------------------------------------------
+# index range [imin,imax) of the sorted dates within tmin and tmax (both included), the limits can
+# be dates, datetimes, timestamps or %Y-%m-%d strings, 0 means no limit
+#---------------------------------------------------------------------------------------------------
+def date_ids(dates,tmin=0,tmax=0):
+    imin = 0
+    imax = len(dates)
+    if not (isinstance(tmin,int) and tmin == 0):
+        imin = int(np.searchsorted(dates,np.datetime64(str(tmin)[0:10],'D'),side='left'))
+    if not (isinstance(tmax,int) and tmax == 0):
+        imax = int(np.searchsorted(dates,np.datetime64(str(tmax)[0:10],'D'),side='right'))
+    return imin,max(imin,imax)
+
+#---------------------------------------------------------------------------------------------------
+# indices of the days kept when combining nadd days (every nadd-th day back from the last day)
+#---------------------------------------------------------------------------------------------------
+def combine_ids(n_days,nadd):
+    return np.arange(n_days-1,-1,-nadd)[::-1]
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Series(n_days=0,tags=None,matrix=None)
+
+     Time series of many tags (countries, states) in one dense tags x dates matrix with a tag to
+     row index. It can be used like the dictionary of series per tag it replaces, the series of a
+     tag is a view of its matrix row.
+
+       tags    - tags in the order of the matrix rows
+       index   - row of each tag
+       matrix  - tags x dates matrix of the values
+       version - number of writes so far (item assignment, add_rows, add_days), derived series
+                 computed before a write are recomputed (see Data_ts.derived)
+
+"""
+class Series:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,n_days=0,tags=None,matrix=None):
+        self.tags = []
+        self.index = {}
+        self.matrix = np.zeros((0,n_days),dtype=np.int64)
+        self.version = 0
+        if tags is not None:
+            self.tags = list(tags)
+            self.index = dict([ (tag,i) for i,tag in enumerate(self.tags) ])
+            self.matrix = matrix
+
+    #-----------------------------------------------------------------------------------------------
+    # dictionary like access
+    #-----------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self,tag):
+        return tag in self.index
+
+    def __iter__(self):
+        return iter(self.tags)
+
+    def keys(self):
+        return list(self.tags)
+
+    def items(self):
+        return [ (tag,self.matrix[i]) for i,tag in enumerate(self.tags) ]
+
+    def get(self,tag,default=None):
+        if tag in self.index:
+            return self.matrix[self.index[tag]]
+        return default
+
+    def __getitem__(self,tag):
+        return self.matrix[self.index[tag]]
+
+    def __setitem__(self,tag,values):
+        values = np.asarray(values)
+        if tag not in self.index:
+            self.add_rows([tag],values.reshape((1,-1)))
+            return
+        if values.shape != (self.matrix.shape[1],):
+            raise ValueError(" ERROR - series for %s needs %d days (not %s)"%\
+                             (tag,self.matrix.shape[1],values.shape))
+        if values.dtype.kind == 'f' and self.matrix.dtype.kind != 'f':
+            self.matrix = self.matrix.astype(np.float64)
+        self.matrix[self.index[tag]] = values
+        self.version += 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # add the rows of the given tags: existing tags are summed up, new ones are appended
+    #-----------------------------------------------------------------------------------------------
+    def add_rows(self,tags,matrix):
+        if len(self.tags) == 0:
+            self.matrix = np.zeros((0,matrix.shape[1]),dtype=matrix.dtype)
+        old = [ i for i,tag in enumerate(tags) if tag in self.index ]
+        new = [ i for i,tag in enumerate(tags) if tag not in self.index ]
+        if len(old) > 0:
+            self.matrix[[ self.index[tags[i]] for i in old ]] += matrix[old]
+        if len(new) > 0:
+            for i in new:
+                self.index[tags[i]] = len(self.tags)
+                self.tags.append(tags[i])
+            self.matrix = np.vstack((self.matrix,matrix[new]))
+        self.version += 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # append new days (columns) given for all our tags
+    #-----------------------------------------------------------------------------------------------
+    def add_days(self,tags,matrix):
+        n_days = self.matrix.shape[1]
+        extended = np.zeros((len(self.tags),n_days+matrix.shape[1]),
+                            dtype=np.result_type(self.matrix,matrix))
+        extended[:,:n_days] = self.matrix
+        extended[[ self.index[tag] for tag in tags ],n_days:] = matrix
+        self.matrix = extended
+        self.version += 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # new series: difference to the day before (first day is 0), selected days or tags, scaled
+    # per tag
+    #-----------------------------------------------------------------------------------------------
+    def delta(self):
+        matrix = np.zeros_like(self.matrix)
+        matrix[:,1:] = np.diff(self.matrix,axis=1)
+        return Series(tags=self.tags,matrix=matrix)
+
+    def days(self,ids):
+        return Series(tags=self.tags,matrix=self.matrix[:,ids])
+
+    def select(self,tags):
+        tags = [ tag for tag in tags if tag in self.index ]
+        return Series(tags=tags,matrix=self.matrix[[ self.index[tag] for tag in tags ]])
+
+    def scaled(self,factors):
+        return Series(tags=self.tags,matrix=self.matrix*np.asarray(factors)[:,np.newaxis])
+
+    #-----------------------------------------------------------------------------------------------
+    # new series: rolling sum or mean over the last nroll days (first days use the days available)
+    #-----------------------------------------------------------------------------------------------
+    def rolling(self,nroll=7,mean=True):
+        n_days = self.matrix.shape[1]
+        upper = np.arange(1,n_days+1)
+        lower = np.maximum(upper-nroll,0)
+        csum = np.zeros((len(self.tags),n_days+1),dtype=np.float64)
+        np.cumsum(self.matrix,axis=1,out=csum[:,1:])
+        matrix = csum[:,upper] - csum[:,lower]
+        if mean:
+            matrix /= (upper-lower)
+        return Series(tags=self.tags,matrix=matrix)
 
 #---------------------------------------------------------------------------------------------------
 """
@@ -11,12 +198,12 @@ Class:  Data_ts()
      Description of the relevant history of the outbreak of an infectious disease.
 
        nadd         - number of intervals (days) added together
-       dates        - times series dates (list)
+       times        - times series dates as in the files (list)
+       dates        - times series dates (numpy datetime64 array)
        population   - population of quoted country or state
-       infected     - number of infected people per day (list)
-       infected_day - number of infected people per day (list)
-       deceased     - number of deceased people per day (list)
-       deceased_day - number of deceased people per day (list)
+       infected     - number of infected people per day (Series)
+       deceased     - number of deceased people per day (Series)
+       derived_cache - derived series computed so far (see derived)
 
 """
 class Data_ts:
@@ -40,13 +227,111 @@ class Data_ts:
 #            "time_series_covid19_deaths_SIMUS.csv"
 #        ]
 
+        self.input_file_pop = "populations.csv"
+        self.cache_file = "data_ts_cache.npz"
+        self.etag_file = "data_ts_etags.json"
+
         self.nadd = 1
         self.data_dir = data_dir
-        self.times = []
+        self.set_times([])
         self.population = {}
-        self.infected = {}
-        self.deceased = {}
+        self.infected = Series()
+        self.deceased = Series()
         
+    #-----------------------------------------------------------------------------------------------
+    # set the dates as in the files and parse them once into the numpy dates
+    #-----------------------------------------------------------------------------------------------
+    def set_times(self,times):
+        self.times = list(times)
+        self.dates = parse_dates(self.times)
+        self.derived_cache = {}
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # index range [imin,imax) of the days from tmin to tmax (both included, 0 means no limit)
+    #-----------------------------------------------------------------------------------------------
+    def date_range(self,tmin=0,tmax=0):
+        return date_ids(self.dates,tmin,tmax)
+
+    #-----------------------------------------------------------------------------------------------
+    # keep only the days from tmin to tmax (both included, 0 means no limit)
+    #-----------------------------------------------------------------------------------------------
+    def trim(self,tmin=0,tmax=0):
+        imin,imax = self.date_range(tmin,tmax)
+        self.set_times(self.times[imin:imax])
+        for values in (self.infected,self.deceased):
+            if len(values) > 0:
+                values.matrix = values.matrix[:,imin:imax]
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # series relative to the population of each tag in percent (nan without a population)
+    #-----------------------------------------------------------------------------------------------
+    def relative(self,series,per=100.):
+        population = np.array([ self.population.get(tag,0) for tag in series.tags ],dtype=float)
+        with np.errstate(divide='ignore'):
+            factors = np.where(population > 0,per/population,np.nan)
+        return series.scaled(factors)
+
+    #-----------------------------------------------------------------------------------------------
+    # derived series of a kind (infected or deceased) after the given operations in this order:
+    #
+    #   delta      - difference to the day before
+    #   sum<n>     - rolling sum over n days (ex. sum7), mean<n> for the rolling mean
+    #   combine<n> - keep every n-th day back from the last day (see derived_dates)
+    #   percent    - percent of the population
+    #   per100k    - per 100k of the population
+    #
+    # Derived series (also the intermediate ones) are computed on first use and kept until the
+    # data change (also writes to the series of the kind), so they are shared and must not be
+    # modified.
+    #-----------------------------------------------------------------------------------------------
+    def derived(self,kind,*ops):
+        values = getattr(self,kind)
+        if len(ops) == 0:
+            return values
+
+        # series of the kind replaced or written since the derived ones were computed?
+        stamp = self.derived_cache.get((kind,))
+        if stamp is None or stamp[0] is not values or stamp[1] != values.version:
+            for key in [ key for key in self.derived_cache if key[0] == kind ]:
+                del self.derived_cache[key]
+            self.derived_cache[(kind,)] = (values,values.version)
+
+        key = (kind,) + ops
+        if key in self.derived_cache:
+            return self.derived_cache[key]
+
+        series = self.derived(kind,*ops[:-1])
+        op = ops[-1]
+        if op == 'delta':
+            series = series.delta()
+        elif op.startswith('sum'):
+            series = series.rolling(int(op[3:]),mean=False)
+        elif op.startswith('mean'):
+            series = series.rolling(int(op[4:]),mean=True)
+        elif op.startswith('combine'):
+            series = series.days(combine_ids(series.matrix.shape[1],int(op[7:])))
+        elif op == 'percent':
+            series = self.relative(series)
+        elif op == 'per100k':
+            series = self.relative(series,100000.)
+        else:
+            raise ValueError(" ERROR - unknown operation on series: %s"%op)
+
+        self.derived_cache[key] = series
+        return series
+
+    #-----------------------------------------------------------------------------------------------
+    # dates of a derived series (only combine changes them)
+    #-----------------------------------------------------------------------------------------------
+    def derived_dates(self,*ops):
+        dates = self.dates
+        for op in ops:
+            if op.startswith('combine'):
+                dates = dates[combine_ids(len(dates),int(op[7:]))]
+        return dates
+
     #-----------------------------------------------------------------------------------------------
     # summary as a string
     #-----------------------------------------------------------------------------------------------
@@ -57,34 +342,201 @@ class Data_ts:
         return range
         
     #-----------------------------------------------------------------------------------------------
-    # download new version of the files
+    # download new versions of the files, all at the same time and only if they changed
     #-----------------------------------------------------------------------------------------------
-    def update_files(self,quiet=False):
+    def update_files(self,quiet=False,timeout=60):
         if not quiet:
             print(" Update the data files")
-        for f in self.input_files_infected+self.input_files_deceased:
-            cmd = "wget %s/%s/%s -O %s/%s >& /dev/null"\
-                %(self.web_site,self.web_dir,f,self.data_dir,f)
+        files = self.input_files_infected+self.input_files_deceased
+
+        # validators of the files we have (ETag and Last-Modified of the last download)
+        etags = {}
+        etag_file = "%s/%s"%(self.data_dir,self.etag_file)
+        if os.path.exists(etag_file):
+            with open(etag_file,'r') as f:
+                etags = json.load(f)
+
+        pool = ThreadPool(len(files))
+        try:
+            results = pool.map(lambda f: self.download_file(f,etags.get(f,{}),timeout),files)
+        finally:
+            pool.close()
+            pool.join()
+
+        for f,(status,seconds,validators) in zip(files,results):
             if not quiet:
-                print(" Updating: %s"%(cmd))
-            os.system(cmd)
-        return
+                print(" Updating: %-45s %-10s (%.2f sec)"%(f,status,seconds))
+            if status == "updated":
+                etags[f] = validators
+        with open(etag_file,'w') as f:
+            json.dump(etags,f,indent=1)
+
+        return dict(zip(files,[ r[0] for r in results ]))
+
+    #-----------------------------------------------------------------------------------------------
+    # download one file if it changed, returns status (updated, unchanged or failed: ..), time
+    # used and the validators of the new version
+    #-----------------------------------------------------------------------------------------------
+    def download_file(self,data_file,validators,timeout=60):
+        start = time.time()
+        url = "%s/%s/%s"%(self.web_site,self.web_dir,data_file)
+        local_file = "%s/%s"%(self.data_dir,data_file)
+        tmp_file = "%s.tmp"%local_file
+        request = Request(url)
+        if os.path.exists(local_file):
+            if 'etag' in validators:
+                request.add_header('If-None-Match',validators['etag'])
+            if 'last_modified' in validators:
+                request.add_header('If-Modified-Since',validators['last_modified'])
+
+        try:
+            with closing(urlopen(request,timeout=timeout)) as response:
+                # write to a temporary file first, so the old version stays intact on failure
+                n_bytes = 0
+                with open(tmp_file,'wb') as f:
+                    while True:
+                        block = response.read(1 << 20)
+                        if not block:
+                            break
+                        f.write(block)
+                        n_bytes += len(block)
+                # a connection closed early just ends the reading (python 3)
+                length = response.info().get('Content-Length')
+                if length is not None and n_bytes != int(length):
+                    raise IOError("incomplete download (%d of %s bytes)"%(n_bytes,length))
+                os.rename(tmp_file,local_file)
+                validators = {}
+                if response.info().get('ETag'):
+                    validators['etag'] = response.info().get('ETag')
+                if response.info().get('Last-Modified'):
+                    validators['last_modified'] = response.info().get('Last-Modified')
+            status = "updated"
+        except HTTPError as e:
+            status = "failed: %s"%(e)
+            if e.code == 304:
+                status = "unchanged"
+        except Exception as e:
+            status = "failed: %s"%(e)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+        return status,time.time()-start,validators
 
     #-----------------------------------------------------------------------------------------------
-    # load all data files
+    # load all data files (from the binary cache if the files did not change since it was written)
+    #
+    # If the files only got new days since the cache was written, only the new days are read and
+    # appended to the cached series. Otherwise all files are read and the cache is written again.
+    #
+    # Only the requested tags (None -> all) and kinds ('infected' and/or 'deceased') are kept,
+    # without the cache only those are read from the files.
     #-----------------------------------------------------------------------------------------------
-    def load_data(self,quiet=False):
+    def load_data(self,quiet=False,cache=True,tags=None,kinds=('infected','deceased')):
+        if cache and self.read_cache(quiet):
+            self.select(tags,kinds)
+            return
+        if cache and self.read_cache(quiet,outdated=True):
+            if self.append_days(quiet):
+                self.write_cache(quiet)
+                self.select(tags,kinds)
+                return
+            # the files changed beyond new days, start from scratch
+            self.set_times([])
+            self.population = {}
+            self.infected = Series()
+            self.deceased = Series()
         if not quiet:
             print(" Load all data from files")
-        for f in self.input_files_infected:
-            self.read_file(f,self.infected,self.population,quiet)
-        for f in self.input_files_deceased:
-            self.read_file(f,self.deceased,self.population,quiet)
+        read_tags,read_kinds = tags,kinds
+        if cache:
+            # the cache has everything
+            read_tags,read_kinds = None,('infected','deceased')
+        if 'infected' in read_kinds:
+            for f in self.input_files_infected:
+                self.read_file(f,self.infected,self.population,quiet,read_tags)
+        if 'deceased' in read_kinds:
+            for f in self.input_files_deceased:
+                self.read_file(f,self.deceased,self.population,quiet,read_tags)
             
-        self.read_file_pop("populations.csv",self.population,quiet)
+        self.read_file_pop(self.input_file_pop,self.population,quiet)
+        self.derived_cache = {}
+
+        if cache:
+            self.write_cache(quiet)
+            self.select(tags,kinds)
             
         return
 
+    #-----------------------------------------------------------------------------------------------
+    # keep only the given tags (None -> all) of the given kinds, the other kinds are emptied
+    #-----------------------------------------------------------------------------------------------
+    def select(self,tags=None,kinds=('infected','deceased')):
+        for kind in ('infected','deceased'):
+            if kind not in kinds:
+                setattr(self,kind,Series())
+            elif tags is not None:
+                setattr(self,kind,getattr(self,kind).select(tags))
+        self.derived_cache = {}
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # key of the input files (name, size and modification time) the cache was made from
+    #-----------------------------------------------------------------------------------------------
+    def cache_key(self):
+        key = []
+        for f in self.input_files_infected+self.input_files_deceased+[self.input_file_pop]:
+            stat = os.stat("%s/%s"%(self.data_dir,f))
+            key.append("%s:%d:%d"%(f,stat.st_size,int(stat.st_mtime)))
+        return "|".join(key)
+
+    #-----------------------------------------------------------------------------------------------
+    # write the loaded series as tags x dates matrices to the binary cache
+    #-----------------------------------------------------------------------------------------------
+    def write_cache(self,quiet=False):
+        arrays = { 'key': np.array([self.cache_key()]), 'times': np.array(self.times) }
+        for name,values in (('infected',self.infected),('deceased',self.deceased)):
+            arrays['%s_tags'%name] = np.array(values.tags)
+            arrays[name] = values.matrix
+        tags = sorted(self.population)
+        arrays['population_tags'] = np.array(tags)
+        arrays['population'] = np.array([self.population[tag] for tag in tags],dtype=np.int64)
+
+        cache_file = "%s/%s"%(self.data_dir,self.cache_file)
+        if not quiet:
+            print(" Writing the cache -- to: %s"%cache_file)
+        tmp_file = "%s.tmp.npz"%cache_file[:-4]
+        np.savez(tmp_file,**arrays)
+        os.rename(tmp_file,cache_file)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # read the binary cache, returns False if there is none or it is outdated (unless outdated
+    # caches are requested explicitly)
+    #-----------------------------------------------------------------------------------------------
+    def read_cache(self,quiet=False,outdated=False):
+        cache_file = "%s/%s"%(self.data_dir,self.cache_file)
+        if not os.path.exists(cache_file):
+            return False
+        try:
+            key = self.cache_key()
+        except OSError:
+            return False
+        with np.load(cache_file) as arrays:
+            if cache_str(arrays['key'][0]) != key and not outdated:
+                if not quiet:
+                    print(" Cache is outdated -- %s"%cache_file)
+                return False
+            if not quiet:
+                print(" Load all data from cache -- %s"%cache_file)
+            self.set_times([ cache_str(t) for t in arrays['times'] ])
+            self.infected = Series(tags=[ cache_str(t) for t in arrays['infected_tags'] ],
+                                   matrix=arrays['infected'])
+            self.deceased = Series(tags=[ cache_str(t) for t in arrays['deceased_tags'] ],
+                                   matrix=arrays['deceased'])
+            for tag,n in zip(arrays['population_tags'],arrays['population']):
+                self.population[cache_str(tag)] = int(n)
+        return True
+
     #-----------------------------------------------------------------------------------------------
     # identify the data file format for proper reading
     #-----------------------------------------------------------------------------------------------
@@ -99,67 +551,144 @@ class Data_ts:
         return n_tag,n_offset
     
     #-----------------------------------------------------------------------------------------------
-    # load one file
+    # load one file: the numbers are converted in one go into a rows x dates integer block and the
+    # rows are summed per tag (group-by on the tag codes), series are stored as numpy arrays.
+    # With tags given only the rows of those tags are read.
     #-----------------------------------------------------------------------------------------------
-    def read_file(self,data_file,values,population,quiet=False):
+    def read_file(self,data_file,values,population,quiet=False,tags=None):
         if not quiet:
             print(" Reading the data -- from: %s"%data_file)
         # loop the file
         with open("%s/%s"%(self.data_dir,data_file),'r') as csvfile:
             ts_file = csv.reader(csvfile, delimiter=',')
-            first = True
-            pop_local = {}
             n_population = -1
-            for row in ts_file:
-                if first:
-                    first = False
-                    n_tag, n_offset = self.find_format(row)
-                    tmp = row[n_offset:]
-                    # for whatever reason the 'death' file also includes a column with population?!
-                    if 'Population' in tmp[0]:
-                        n_population = n_offset
-                        n_offset += 1
-                        tmp = row[n_offset:]
-                    if len(self.times) == 0:
-                        # take those times
-                        self.times = tmp
-                    else:
-                        # check consistency
-                        if len(tmp) != len(self.times):
-                            print(" ERROR - found inconsistent time series length (O:%d != N:%d)"%\
-                                  (len(self.times),len(tmp)))
-                            sys.exit(-1)
-                        if tmp[0] != self.times[0]:
-                            print(" ERROR - found inconsistent time series start (O:%s != N:%s)"%\
-                                  (tmp[0],self.times[0]))
-                            sys.exit(-1)
+            row = next(ts_file)
+            n_tag, n_offset = self.find_format(row)
+            tmp = row[n_offset:]
+            # for whatever reason the 'death' file also includes a column with population?!
+            if 'Population' in tmp[0]:
+                n_population = n_offset
+                n_offset += 1
+                tmp = row[n_offset:]
+            if len(self.times) == 0:
+                # take those times
+                self.set_times(tmp)
+            else:
+                # check consistency
+                if len(tmp) != len(self.times):
+                    print(" ERROR - found inconsistent time series length (O:%d != N:%d)"%\
+                          (len(self.times),len(tmp)))
+                    sys.exit(-1)
+                if tmp[0] != self.times[0]:
+                    print(" ERROR - found inconsistent time series start (O:%s != N:%s)"%\
+                          (tmp[0],self.times[0]))
+                    sys.exit(-1)
+
+            # only lines that mention one of the requested tags need to be parsed
+            lines = csvfile
+            if tags is not None:
+                lines = (line for line in csvfile if any(tag in line for tag in tags))
+
+            # read all lines as the next timeseries values with their tag code
+            index = {}
+            codes = []
+            pops = []
+            rows = []
+            for row in csv.reader(lines, delimiter=','):
+                if tags is not None and row[n_tag] not in tags:
                     continue
-                
-                # read this line as the next timeseries values, might have to be added to existing
-                tag = row[n_tag]
-    
-                # find existing series or create empty one
-                if tag in values.keys():
-                    series = values[tag]
-                else:
-                    series = [ 0 ] * len(self.times)
-                    
-                # loop through the values and convert to integer
-                tmp_values = []
-                for value in row[n_offset:]:
-                    tmp_values.append(int(value))
-    
-                series = [x+y for x,y in zip(series,tmp_values)]
-    
-                values[tag] = series
+                codes.append(index.setdefault(row[n_tag],len(index)))
+                rows.append(row[n_offset:])
                 if n_population != -1:
-                    if tag in population:
-                        population[tag] += int(row[n_population])
-                    else:
-                        population[tag] = int(row[n_population])                        
-                
+                    pops.append(row[n_population])
+
+        # convert to integer in one block and add up the rows of each tag
+        codes = np.array(codes,dtype=np.int64)
+        series = self.sum_rows(codes,rows,len(index),len(self.times))
+        if n_population != -1:
+            pops = np.bincount(codes,weights=np.array(pops,dtype=np.int64),minlength=len(index))
+
+        # might have to be added to existing series
+        tags = [ None ] * len(index)
+        for tag,i in index.items():
+            tags[i] = tag
+            if n_population != -1:
+                population[tag] = population.get(tag,0) + int(pops[i])
+        values.add_rows(tags,series)
+
         return
     
+    #-----------------------------------------------------------------------------------------------
+    # convert the rows (lists of number strings) in one block and sum them per tag code
+    #-----------------------------------------------------------------------------------------------
+    def sum_rows(self,codes,rows,n_tags,n_days):
+        block = np.zeros((len(rows),n_days),dtype=np.int64)
+        if len(rows) > 0 and n_days > 0:
+            block[:] = np.fromstring(",".join([",".join(row) for row in rows]),
+                                     dtype=np.int64,sep=',').reshape(block.shape)
+        series = np.zeros((n_tags,n_days),dtype=np.int64)
+        np.add.at(series,codes,block)
+        return series
+
+    #-----------------------------------------------------------------------------------------------
+    # append the days that are new in the files to the loaded series, returns False if the files
+    # do not just extend the loaded dates and tags (then everything has to be read again)
+    #-----------------------------------------------------------------------------------------------
+    def append_days(self,quiet=False):
+        n_days = len(self.times)
+        times = None
+        for files,values in ((self.input_files_infected,self.infected),
+                             (self.input_files_deceased,self.deceased)):
+            added = Series()
+            for f in files:
+                new_times,series = self.read_file_days(f,n_days,quiet)
+                if new_times is None or (times is not None and new_times != times):
+                    return False
+                times = new_times
+                added.add_rows(series.tags,series.matrix)
+            if set(added.tags) != set(values.tags):
+                return False
+            values.add_days(added.tags,added.matrix)
+
+        if not quiet:
+            print(" Appended %d new days"%(len(times)))
+        self.set_times(self.times + times)
+        self.read_file_pop(self.input_file_pop,self.population,quiet)
+        return True
+
+    #-----------------------------------------------------------------------------------------------
+    # read only the days after the first n_days of one file, returns the new dates and the Series
+    # of the new values (None if the file does not start with our dates)
+    #-----------------------------------------------------------------------------------------------
+    def read_file_days(self,data_file,n_days,quiet=False):
+        if not quiet:
+            print(" Reading the new days -- from: %s"%data_file)
+        with open("%s/%s"%(self.data_dir,data_file),'r') as csvfile:
+            header = next(csv.reader([csvfile.readline()]))
+            n_tag, n_offset = self.find_format(header)
+            if 'Population' in header[n_offset]:
+                n_offset += 1
+            times = header[n_offset:]
+            if times[:n_days] != self.times:
+                return None,None
+            n_new = len(times) - n_days
+
+            # the new days are the last fields, only the beginning of the line has to be parsed
+            index = {}
+            codes = []
+            rows = []
+            for line in csvfile:
+                fields = line.rstrip('\r\n').rsplit(',',n_new)
+                row = next(csv.reader([fields[0]]))
+                codes.append(index.setdefault(row[n_tag],len(index)))
+                rows.append(fields[1:n_new+1])
+
+        tags = [ None ] * len(index)
+        for tag,i in index.items():
+            tags[i] = tag
+        series = self.sum_rows(np.array(codes,dtype=np.int64),rows,len(index),n_new)
+        return times[n_days:],Series(tags=tags,matrix=series)
+
     #-----------------------------------------------------------------------------------------------
     # load external population file
     #-----------------------------------------------------------------------------------------------
@@ -177,61 +706,34 @@ class Data_ts:
         return
 
     #-----------------------------------------------------------------------------------------------
-    # combine data from several days
+    # combine data from several days: keep every nadd-th day counting back from the last day
     #-----------------------------------------------------------------------------------------------
     def combine_values(self,nadd=7):
 
         self.nadd = nadd
         
-        # temporary combined variables
-        tim = []
-
         # first sort of the dates to use
-        n = 0
-        for t in reversed(self.times):
-            if n%nadd == 0:
-                tim.append(t)
-            n += 1
-        self.times = tim[::-1]
-
-        # now add up the numbers for each tag separately
-        for tag in self.infected:
-            inf = []
-            dec = []
-            n = 0
-            for i,d in zip(self.infected[tag][::-1],self.deceased[tag][::-1]):
-                if n%nadd == 0:
-                    inf.append(i)
-                    dec.append(d)
-                n += 1
-
-            self.infected[tag] = inf[::-1]
-            self.deceased[tag] = dec[::-1]
+        ids = combine_ids(len(self.times),nadd)
+        self.set_times([ self.times[i] for i in ids ])
+
+        # now select the days for all tags at once (deceased might not be loaded)
+        for values in (self.infected,self.deceased):
+            if len(values) > 0:
+                values.matrix = values.matrix[:,ids]
             
         return
 
-    def rolling_values(self,nroll=7):
+    #-----------------------------------------------------------------------------------------------
+    # rolling sum or mean over the last nroll days (the first days use the days available)
+    #-----------------------------------------------------------------------------------------------
+    def rolling_values(self,nroll=7,mean=True):
 
         if nroll < 2:
             return
         
-        for tag in self.infected:
-            inf_csum, infs = [0], []
-            #dec_csum, decs = [0], []
-            for i, x in enumerate(self.infected[tag]):
-                #print(i,tag,len(self.infected[tag]),len(self.deceased[tag]),dec_csum)
-                inf_csum.append(inf_csum[i-1] + self.infected[tag][i])
-                #dec_csum.append(dec_csum[i-1] + self.deceased[tag][i])
-                if i>=nroll:
-                    inf = (inf_csum[i] - inf_csum[i-nroll])/float(nroll)
-                    #dec = (dec_csum[i] - dec_csum[i-nroll])/float(nroll)
-                else:
-                    inf = (inf_csum[i] - inf_csum[0])/float(i+1)
-                    #dec = (dec_csum[i] - dec_csum[0])/float(i+1)
-
-                infs.append(inf)
-                #decs.append(dec)
-            
-            self.infected[tag] = infs
-            #self.deceased[tag] = decs
-            
+        for values in (self.infected,self.deceased):
+            if len(values) > 0:
+                values.matrix = values.rolling(nroll,mean).matrix
+        self.derived_cache = {}
+
+        return
@@ -0,0 +1,134 @@
+import datetime
+import numpy
+# Our stuff
+import cohort
+import history
+
+#---------------------------------------------------------------------------------------------------
+# compartmental model of the given simulations (one parameter set each, same start and days)
+#---------------------------------------------------------------------------------------------------
+def from_simulations(simulations,model="age",latent=0.):
+    return Compartmental([ s.pathogen() for s in simulations ],
+                         [ s.mean_contacts() for s in simulations ],
+                         [ s.n_popul for s in simulations ],
+                         [ s.i_initial*s.r_unknown for s in simulations ],
+                         simulations[0].n_days,simulations[0].date,model,latent)
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Compartmental(pathogens,contacts,n_popul,i_initial,n_days,date,model="age",latent=0.)
+
+     Deterministic compartmental model solved for many parameter sets at once (all states are
+     arrays over the parameter sets), with one day steps like the other engines. The infection rate
+     per susceptible person is 1-exp(-I*c*pi/N), with c the mean number of contacts (of the mix of
+     Social_types) and pi the infection probability of the Pathogen at 0 days (as in the agent
+     populations). The models differ in how infections end:
+
+        age  - infected counted per infection age, ending with the duration distribution of the
+               Pathogen (expected values of the cohort engine)
+        sir  - infections end with the constant daily rate 1/(mean days infected)
+        seir - as sir with an exposed (not yet infectious) state lasting latent days on average
+
+        pathogens    - Pathogen per parameter set
+        contacts     - mean number of contacts per person and day per parameter set
+        n_popul      - number of people per parameter set
+        i_initial    - number of infected people at the start per parameter set
+        n_days       - number of days to solve
+        date         - date of the start (%Y-%m-%d)
+        model        - age, sir or seir
+        latent       - mean latent days (seir only, number or one per parameter set)
+
+"""
+class Compartmental:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,pathogens,contacts,n_popul,i_initial,n_days,date,model="age",latent=0.):
+        if model not in ('age','sir','seir'):
+            raise ValueError("unknown compartmental model: %s"%(model))
+        self.model = model
+        self.n_days = n_days
+        self.date = date
+        self.n_popul = numpy.asarray(n_popul,dtype=float)
+        self.i_initial = numpy.asarray(i_initial,dtype=float)
+        self.latent = numpy.zeros(len(self.n_popul)) + latent
+
+        # rates of each parameter set
+        self.beta = numpy.array([ c*p.pi(0) for p,c in zip(pathogens,contacts) ])
+        self.death_rate = numpy.array([ p.death_rate for p in pathogens ])
+
+        # end of the infections: hazard per infection age (ages beyond the end have hazard 1)
+        hazards = [ cohort.hazards(p) for p in pathogens ]
+        self.hazard = numpy.ones((len(hazards),max([ len(h) for h in hazards ])))
+        for k,h in enumerate(hazards):
+            self.hazard[k,:len(h)] = h
+        left = numpy.cumprod(1.-self.hazard,axis=1)
+        self.gamma = 1./(1.+left[:,:-1].sum(axis=1))
+
+    def summary(self):
+        return " Compartmental: %s model, %d parameter sets, n_days=%d, start=%s"%\
+            (self.model,len(self.n_popul),self.n_days,self.date)
+
+    #-----------------------------------------------------------------------------------------------
+    # solve all parameter sets, returns the arrays (parameter set x day) of the infected,
+    # recovered and deceased people at the start of each day (days 0 to n_days-1, as recorded by
+    # the agent simulation)
+    #-----------------------------------------------------------------------------------------------
+    def run(self):
+        n_sets = len(self.n_popul)
+        s = self.n_popul - self.i_initial
+        e = numpy.zeros(n_sets)
+        i = self.i_initial.copy()
+        i_age = numpy.zeros(self.hazard.shape)
+        i_age[:,0] = self.i_initial
+        r = numpy.zeros(n_sets)
+        d = numpy.zeros(n_sets)
+        p_latent = 1.-numpy.exp(-1./numpy.maximum(self.latent,1e-9))
+
+        infected = numpy.zeros((n_sets,self.n_days))
+        recovered = numpy.zeros((n_sets,self.n_days))
+        deceased = numpy.zeros((n_sets,self.n_days))
+        for day in range(self.n_days):
+            infected[:,day] = i + e
+            recovered[:,day] = r
+            deceased[:,day] = d
+            if day == self.n_days-1:
+                break
+
+            # new infections (exposed first for seir) and the infections over today
+            new = s*(1.-numpy.exp(-self.beta*i/self.n_popul))
+            s = s - new
+            if self.model == 'age':
+                done = i_age*self.hazard
+                n_done = done.sum(axis=1)
+                i_age[:,1:] = i_age[:,:-1] - done[:,:-1]
+                i_age[:,0] = new
+                i = i_age.sum(axis=1)
+            else:
+                n_done = i*self.gamma
+                if self.model == 'seir':
+                    new,e = e*p_latent,e + new - e*p_latent
+                i = i - n_done + new
+            r = r + n_done*(1.-self.death_rate)
+            d = d + n_done*self.death_rate
+
+        return infected,recovered,deceased
+
+    #-----------------------------------------------------------------------------------------------
+    # History of each parameter set (infected include the exposed, rounded to people)
+    #-----------------------------------------------------------------------------------------------
+    def histories(self,record=""):
+        infected,recovered,deceased = [ numpy.rint(x).astype(int) for x in self.run() ]
+        start = datetime.datetime.strptime(self.date,"%Y-%m-%d")
+        dates = [ start + datetime.timedelta(days=day) for day in range(self.n_days) ]
+        hists = []
+        for k in range(len(self.n_popul)):
+            hist = history.History(record)
+            hist.dates = list(dates)
+            hist.infected = infected[k].tolist()
+            hist.recovered = recovered[k].tolist()
+            hist.deceased = deceased[k].tolist()
+            hist.n_days = len(dates)
+            hists.append(hist)
+        return hists
@@ -0,0 +1,97 @@
+import multiprocessing
+import numpy
+# Our stuff
+import history
+
+#---------------------------------------------------------------------------------------------------
+# run one member of the ensemble (module level, so it can be sent to the worker processes)
+#---------------------------------------------------------------------------------------------------
+def run_member(args):
+    simulation,seed,record = args
+    hist = simulation.run(seed,record,quiet=True)
+    if record != "":
+        hist.write()
+    return hist
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Ensemble(simulation,seeds,n_proc=0)
+
+     Monte Carlo ensemble of one simulation run with many seeds in a pool of processes. The time
+     series of all members are aggregated into the mean and quantiles per day.
+
+        simulation - the Simulation to run
+        seeds      - list of seeds, one per member
+        n_proc     - number of processes (0 -> one per core)
+        histories  - histories of all members (after run)
+
+"""
+class Ensemble:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,simulation,seeds,n_proc=0):
+        self.simulation = simulation
+        self.seeds = seeds
+        self.n_proc = n_proc
+        if self.n_proc < 1:
+            self.n_proc = multiprocessing.cpu_count()
+        self.histories = []
+
+    #-----------------------------------------------------------------------------------------------
+    # summary as a string
+    #-----------------------------------------------------------------------------------------------
+    def summary(self):
+        return " Ensemble: %d seeds on %d processes --%s"%\
+            (len(self.seeds),self.n_proc,self.simulation.summary())
+
+    #-----------------------------------------------------------------------------------------------
+    # run all members, each member history is written to <record>_seed<seed> if record is given
+    #-----------------------------------------------------------------------------------------------
+    def run(self,record=""):
+        jobs = []
+        for seed in self.seeds:
+            member_record = ""
+            if record != "":
+                member_record = "%s_seed%d"%(record,seed)
+            jobs.append((self.simulation,seed,member_record))
+
+        pool = multiprocessing.Pool(min(self.n_proc,len(jobs)))
+        try:
+            self.histories = pool.map(run_member,jobs,chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        return self.histories
+
+    #-----------------------------------------------------------------------------------------------
+    # longest list of dates and the members values (seed x day), finished members keep their state
+    #-----------------------------------------------------------------------------------------------
+    def values(self,kind):
+        dates = max([h.dates for h in self.histories],key=len)
+        values = numpy.zeros((len(self.histories),len(dates)))
+        for i,h in enumerate(self.histories):
+            series = getattr(h,kind)
+            values[i,:len(series)] = series
+            values[i,len(series):] = series[-1]
+        return dates,values
+
+    #-----------------------------------------------------------------------------------------------
+    # write mean (regular data base line) and quantiles (labeled data base line) to record
+    #-----------------------------------------------------------------------------------------------
+    def write(self,record,quantiles=[0.16,0.50,0.84]):
+        hist = history.History(record)
+        rows = [ [hist.data_base] ]
+        for q in quantiles:
+            rows.append([hist.data_label("q%02d"%(int(round(100*q))))])
+
+        for kind in ['infected','recovered','deceased']:
+            hist.dates,values = self.values(kind)
+            rows[0].append(numpy.rint(values.mean(axis=0)).astype(int))
+            for i,q in enumerate(quantiles):
+                rows[i+1].append(numpy.rint(numpy.percentile(values,100*q,axis=0)).astype(int))
+
+        hist.write_rows(rows)
+        return
@@ -1,10 +1,14 @@
+import datetime
+
 #---------------------------------------------------------------------------------------------------
 """
-Class:  History(record)
+Class:  History(record,keep=True)
 
      Description of the relevant history of the outbreak of an infectious disease.
 
-       record    - the file where to record (only done at the end, maybe need to change that)
+       record    - the file where to record (the _SIMUS files are written at the end, each day can
+                   be streamed to <record>_stream.csv as it comes, see open_stream)
+       keep      - keep the days in memory (otherwise they are read back from the stream)
 
        dates     - times series dates (list)
        infected  - number of infected people per day (list)
@@ -17,12 +21,18 @@ class History:
     #-----------------------------------------------------------------------------------------------
     # constructor
     #-----------------------------------------------------------------------------------------------
-    def __init__(self,record):
+    def __init__(self,record,keep=True):
         self.record = record
+        self.keep = keep
+        self.stream = None
+        self.n_days = 0
         self.header_base = \
             "UID,iso2,iso3,code3,FIPS,Admin2,Province_State,Country_Region,Lat,Long_,Combined_Key"
-        self.data_base = \
-            "84025017,US,USA,840,25017.0,Middlesex,Massachusetts,US,42.48607732,-71.39049229,\"Middlesex, Massachusetts, US\""
+        self.header_global = "Province/State,Country/Region,Lat,Long"
+        self.data_format = \
+            "84025017,US,USA,840,25017.0,Middlesex,%s,US,42.48607732,-71.39049229,\"Middlesex, %s, US\""
+        self.region = "Massachusetts"
+        self.data_base = self.data_format%(self.region,self.region)
         self.dates = []
         self.infected = []
         self.recovered = []
@@ -42,48 +52,105 @@ class History:
     # add another day
     #-----------------------------------------------------------------------------------------------
     def add_day(self,date,n_infected,n_recovered,n_deceased):
-        self.dates.append(date)
-        self.infected.append(n_infected)
-        self.recovered.append(n_recovered)
-        self.deceased.append(n_deceased)
+        if self.keep:
+            self.dates.append(date)
+            self.infected.append(n_infected)
+            self.recovered.append(n_recovered)
+            self.deceased.append(n_deceased)
+        if self.stream is not None:
+            self.stream.write("%s,%d,%d,%d\n"%(date,n_infected,n_recovered,n_deceased))
+            self.stream.flush()
+        self.n_days += 1
+
+    #-----------------------------------------------------------------------------------------------
+    # stream the days to <record>_stream.csv (one line per day, flushed, so it can be followed
+    # live), call before adding the first day
+    #-----------------------------------------------------------------------------------------------
+    def stream_file(self):
+        return "%s_stream.csv"%(self.record)
+
+    def open_stream(self):
+        self.stream = open(self.stream_file(),'w')
+        self.stream.write("Date,Infected,Recovered,Deceased\n")
+        self.stream.flush()
+        return
+
+    def close_stream(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # all days (dates, infected, recovered, deceased), from memory or read back from the stream
+    #-----------------------------------------------------------------------------------------------
+    def days(self):
+        if self.keep or self.n_days == 0:
+            return self.dates,self.infected,self.recovered,self.deceased
+
+        days = ([],[],[],[])
+        if self.stream is not None:
+            self.stream.flush()
+        with open(self.stream_file(),'r') as f:
+            f.readline()
+            for line in f:
+                fields = line.strip().split(",")
+                days[0].append(datetime.datetime.strptime(fields[0],"%Y-%m-%d %H:%M:%S"))
+                for i in range(1,4):
+                    days[i].append(int(fields[i]))
+        return days
+
+    #-----------------------------------------------------------------------------------------------
+    # set the days already simulated (ex. from a snapshot), they are streamed if the stream is open
+    #-----------------------------------------------------------------------------------------------
+    def set_days(self,days):
+        for day in zip(*days):
+            self.add_day(*day)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # data base line for a labeled variant of the region (ex. a quantile of an ensemble)
+    #-----------------------------------------------------------------------------------------------
+    def data_label(self,label):
+        region = "%s %s"%(self.region,label)
+        return self.data_format%(region,region)
+
+    #-----------------------------------------------------------------------------------------------
+    # data base line keyed by a whole US state (no county details, header_base format) and by a
+    # country (header_global format, as the JHU global files)
+    #-----------------------------------------------------------------------------------------------
+    def data_region(self,region,uid=0):
+        return "%d,,,,,,%s,US,,,\"%s, US\""%(uid,region,region)
+
+    def data_country(self,country):
+        return ",%s,,"%(country)
 
     #-----------------------------------------------------------------------------------------------
     # record history to its file
     #-----------------------------------------------------------------------------------------------
     def write(self):
-        # two lines per file: header and data
-        with open("%s_confirmed_SIMUS.csv"%self.record,'w') as csvfile:
-            
-            csvfile.write(self.header_base)
-            for date in self.dates:
-                csvfile.write(",%s"%date)
-            csvfile.write("\n")
-
-            csvfile.write(self.data_base)
-            for i in self.infected:
-                csvfile.write(",%d"%i)
-            csvfile.write("\n")
-            
-        with open("%s_recovered_SIMUS.csv"%self.record,'w') as csvfile:
-
-            csvfile.write(self.header_base)
-            for date in self.dates:
-                csvfile.write(",%s"%date)
-            csvfile.write("\n")
-
-            csvfile.write(self.data_base)
-            for r in self.recovered:
-                csvfile.write(",%d"%r)
-            csvfile.write("\n")
-
-        with open("%s_deaths_SIMUS.csv"%self.record,'w') as csvfile:
-
-            csvfile.write(self.header_base)
-            for date in self.dates:
-                csvfile.write(",%s"%date)
-            csvfile.write("\n")
-
-            csvfile.write(self.data_base)
-            for d in self.deceased:
-                csvfile.write(",%d"%d)
-            csvfile.write("\n")
+        dates,infected,recovered,deceased = self.days()
+        self.write_rows([(self.data_base,infected,recovered,deceased)],dates)
+
+    #-----------------------------------------------------------------------------------------------
+    # record several rows (data base line, infected, recovered, deceased) for our dates
+    #-----------------------------------------------------------------------------------------------
+    def write_rows(self,rows,dates=None,header=None):
+        if dates is None:
+            dates = self.dates
+        if header is None:
+            header = self.header_base
+        # one header line per file and one line per row
+        for i,kind in enumerate(['confirmed','recovered','deaths']):
+            with open("%s_%s_SIMUS.csv"%(self.record,kind),'w') as csvfile:
+
+                csvfile.write(header)
+                for date in dates:
+                    csvfile.write(",%s"%date)
+                csvfile.write("\n")
+
+                for row in rows:
+                    csvfile.write(row[0])
+                    for value in row[i+1]:
+                        csvfile.write(",%d"%value)
+                    csvfile.write("\n")
@@ -0,0 +1,139 @@
+import csv
+import os
+import datetime
+import numpy
+# Our stuff
+import cohort
+import data_ts
+import history
+
+#---------------------------------------------------------------------------------------------------
+# number of people per US state (population column of the JHU US deaths file, if downloaded) and
+# per country (the ranked rows of data/populations.csv, the US states listed after them have no
+# rank and are not countries)
+#---------------------------------------------------------------------------------------------------
+def read_populations(data_dir,quiet=False):
+    data = data_ts.Data_ts(data_dir)
+    states = {}
+    if os.path.exists(os.path.join(data_dir,"time_series_covid19_deaths_US.csv")):
+        data.read_file("time_series_covid19_deaths_US.csv",data_ts.Series(),states,quiet)
+    countries = {}
+    with open(os.path.join(data_dir,data.input_file_pop),'r') as csvfile:
+        for row in csv.reader(csvfile,delimiter=','):
+            if len(row) > 0 and not row[0].startswith('#') and row[0].strip() != "":
+                countries[row[1].strip()] = int(row[2].replace(' ',''))
+    return states,countries
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Metapopulation(simulation,regions,coupling=0.,us=True)
+
+     Outbreak in many regions at once, each region a cohort population (see cohort.py) and all of
+     them in one state array (region x infection age), so a day of all US states costs about as
+     much as one. Infected people make the fraction coupling of their contacts anywhere (spread
+     evenly over all regions) and the rest in their own region. The parameters, the number of days
+     and the start come from the Simulation, the initial infections are spread over the regions
+     proportional to their population. The regions are written like the JHU US files (keyed by
+     the state) or like the JHU global files (keyed by the country).
+
+        simulation - the Simulation with the parameters (its n_popul is not used)
+        regions    - list of (region, number of people)
+        coupling   - fraction of the contacts outside of the own region
+        us         - the regions are US states (otherwise countries)
+        infected   - infected people per region and day (after run)
+        recovered  - recovered people per region and day (after run)
+        deceased   - deceased people per region and day (after run)
+
+"""
+class Metapopulation:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,simulation,regions,coupling=0.,us=True):
+        self.simulation = simulation
+        self.regions = [ region for region,n in regions ]
+        self.n_popul = numpy.array([ n for region,n in regions ],dtype=numpy.int64)
+        self.coupling = coupling
+        self.us = us
+        self.dates = []
+        self.infected = None
+        self.recovered = None
+        self.deceased = None
+
+    def summary(self):
+        return " Metapopulation: %d regions, n=%d, coupling=%f --%s"%\
+            (len(self.regions),self.n_popul.sum(),self.coupling,self.simulation.summary())
+
+    #-----------------------------------------------------------------------------------------------
+    # run all regions for the given seed
+    #-----------------------------------------------------------------------------------------------
+    def run(self,seed,quiet=False):
+        corona = self.simulation.pathogen()
+        beta = self.simulation.mean_contacts()*corona.pi(0)
+        hazard = cohort.hazards(corona)
+        numpy.random.seed(seed=int(seed))
+
+        # initial infections proportional to the population
+        n_initial = self.simulation.i_initial*self.simulation.r_unknown
+        s = self.n_popul.copy()
+        infected = numpy.zeros((len(self.regions),len(hazard)),dtype=numpy.int64)
+        infected[:,0] = numpy.minimum(numpy.random.multinomial(n_initial,
+                                                               self.n_popul/float(s.sum())),s)
+        s -= infected[:,0]
+        r = numpy.zeros(len(self.regions),dtype=numpy.int64)
+        d = numpy.zeros(len(self.regions),dtype=numpy.int64)
+        n_all = float(self.n_popul.sum())
+
+        today = datetime.datetime.strptime(self.simulation.date,"%Y-%m-%d")
+        self.dates = []
+        days = []
+        for i_days in range(self.simulation.n_days):
+            i = infected.sum(axis=1)
+            self.dates.append(today)
+            days.append((i,r.copy(),d.copy()))
+            if not quiet:
+                print("Day: %d (%s) == Metapopulation: n_infected=%d, n_recovered=%d,"
+                      " n_deceased: %d"%(i_days,today,i.sum(),r.sum(),d.sum()))
+            if i_days == self.simulation.n_days-1 or i.sum() == 0:
+                break
+
+            # exposures in the own region and evenly over all regions
+            force = beta*((1.-self.coupling)*i/self.n_popul.astype(float) +
+                          self.coupling*i.sum()/n_all)
+            new = numpy.random.binomial(s,1.-numpy.exp(-force))
+
+            # infections over today, die or recover
+            done = numpy.random.binomial(infected,hazard)
+            n_done = done.sum(axis=1)
+            dead = numpy.random.binomial(n_done,corona.death_rate)
+
+            # next day: everybody one day older, the new infections start at day 0
+            infected[:,1:] = infected[:,:-1] - done[:,:-1]
+            infected[:,0] = new
+            s -= new
+            r += n_done - dead
+            d += dead
+            today = today + datetime.timedelta(days=1)
+
+        self.infected,self.recovered,self.deceased = \
+            [ numpy.array([ day[k] for day in days ]).T for k in range(3) ]
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # write one row per region (keyed by the state or the country) to the record
+    #-----------------------------------------------------------------------------------------------
+    def write(self,record):
+        hist = history.History(record)
+        rows = []
+        for k,region in enumerate(self.regions):
+            if self.us:
+                data = hist.data_region(region,k+1)
+            else:
+                data = hist.data_country(region)
+            rows.append((data,self.infected[k],self.recovered[k],self.deceased[k]))
+        header = hist.header_base
+        if not self.us:
+            header = hist.header_global
+        hist.write_rows(rows,self.dates,header)
+        return
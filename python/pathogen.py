@@ -29,9 +29,15 @@ class Pathogen:
     def expose(self,i_day):
         return numpy.random.uniform()<self.pi(i_day)
     
+    def expose_batch(self,i_days):
+        return numpy.random.uniform(0,1,len(i_days))<self.pi(i_days)
+    
     def duration(self):
         return self.avg_duration.next()
         
+    def durations(self,n):
+        return self.avg_duration.sample(n)
+        
     def summary(self):
         return "AvgDuration: %f +- %f, P_infect: %f,%f Death_rate: %f"%\
             (self.avg_duration.mean,self.avg_duration.std,\
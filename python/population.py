@@ -1,4 +1,17 @@
+import os
+import pickle
 import numpy
+# Our stuff
+from compartment import Compartment
+from calendar_queue import Calendar_queue
+from contact_graph import Contact_graph
+
+#---------------------------------------------------------------------------------------------------
+# day at the end of which an infection of the given duration is over, counting the person as
+# infected from first_day on (same as n_days_i > n_days_r with n_days_i = 1 on the first day)
+#---------------------------------------------------------------------------------------------------
+def done_day(first_day,duration):
+    return first_day + numpy.maximum(numpy.floor(duration)-1,0).astype(int)
 
 #---------------------------------------------------------------------------------------------------
 """
@@ -8,6 +21,12 @@ Class:  Population(ntotal)
 
         ntotal - total number of people to consider.
 
+     Each infection is filed in the calendar under the day it is over, so the daily step only
+     handles the people recovering or dying that day (besides the exposures of the infected).
+
+        day      - number of days spread so far
+        calendar - infected people by the day they are done (Calendar_queue)
+
 """
 class Population:
 
@@ -16,12 +35,16 @@ class Population:
     #-----------------------------------------------------------------------------------------------
     def __init__(self):
         self.list = []
-        self.infected = []
-        self.recovered = []
-        self.deceased = []
+        self.infected = Compartment()
+        self.recovered = Compartment()
+        self.deceased = Compartment()
+        self.day = 0
+        self.calendar = Calendar_queue()
 
     def add_person(self,person):
         self.list.append(person)
+        if person.status == 1:
+            self.calendar.add(person.day_r,len(self.list)-1)
         return
 
     def infect(self,id,corona):
@@ -32,9 +55,11 @@ class Population:
             self.recovered.remove(id)
         if p.status == -2:
             self.deceased.remove(id)
-        # infect and add to infected list
-        p.infect(corona.duration())
-        self.infected.append(id)
+        # infect (from today on) and add to infected list
+        duration = corona.duration()
+        p.infect(duration,done_day(self.day,duration))
+        self.calendar.add(p.day_r,id)
+        self.infected.add(id)
 
     def expose(self,id,corona):
         # person
@@ -48,16 +73,18 @@ class Population:
         if not corona.expose(p.n_days_i):
             return
         
-        # infect and add to infected list
-        p.infect(corona.duration())
-        self.infected.append(id)
+        # infect (from tomorrow on) and add to infected list
+        duration = corona.duration()
+        p.infect(duration,done_day(self.day+1,duration))
+        self.calendar.add(p.day_r,id)
+        self.infected.add(id)
         
         return
     
     def spread(self,corona):
 
-        # loop through infected people once
-        for id in self.infected:
+        # loop through the people infected at the beginning of the day once
+        for id in self.infected.ids().copy():
             p = self.list[id]
 
             contact_delta_indices = p.social_type.daily_exposure()
@@ -72,18 +99,21 @@ class Population:
             #    # expose this person
             #    self.expose(iid,corona)
 
-            # increase number of days sick
-            p.next_day()
-            # remove person from our list
-            if p.n_days_i>p.n_days_r:
-                self.infected.remove(id)
-                # die or recover
-                if numpy.random.uniform(0,1) > corona.death_rate:
-                    p.recover(corona)
-                    self.recovered.append(id)
-                else:
-                    p.die(corona)
-                    self.deceased.append(id)
+        # people done today die or recover (entries of people infected again are outdated)
+        for id in self.calendar.pop(self.day):
+            p = self.list[id]
+            if p.status != 1 or p.day_r != self.day:
+                continue
+            self.infected.remove(id)
+            # die or recover
+            if numpy.random.uniform(0,1) > corona.death_rate:
+                p.recover(corona)
+                self.recovered.add(id)
+            else:
+                p.die(corona)
+                self.deceased.add(id)
+
+        self.day += 1
         return
     
     def i(self):
@@ -103,32 +133,32 @@ class Population:
 
         # check population status
         if self.r()>=self.n():
-            print "Day: %d (%s) == %s"%(i_days, today, self.summary())
-            print ""
-            print " ==================="
-            print " Pathogen completed!"
-            print " ==================="
-            print " - duration %d days"%(i_days) 
-            print " - colletaral %s"%(self.summary()) 
-            print ""
+            print("Day: %d (%s) == %s"%(i_days, today, self.summary()))
+            print("")
+            print(" ===================")
+            print(" Pathogen completed!")
+            print(" ===================")
+            print(" - duration %d days"%(i_days)) 
+            print(" - colletaral %s"%(self.summary())) 
+            print("")
             status = False
             
         # check pathogen status
         if self.i()<1:
-            print "Day: %d (%s) == %s"%(i_days, today, self.summary())
-            print ""
-            print " ====================="
-            print " The pathogen is dead!"
-            print " ====================="
-            print " - duration %d days"%(i_days) 
-            print " - colletaral %s"%(self.summary()) 
-            print ""
+            print("Day: %d (%s) == %s"%(i_days, today, self.summary()))
+            print("")
+            print(" =====================")
+            print(" The pathogen is dead!")
+            print(" =====================")
+            print(" - duration %d days"%(i_days)) 
+            print(" - colletaral %s"%(self.summary())) 
+            print("")
             status = False
 
         return status
     
     def show(self):
-        print "##\n Population of %d people (infected: %d)"%(self.n(),self.i())
+        print("##\n Population of %d people (infected: %d)"%(self.n(),self.i()))
         for p in self.list:
             p.show()
 
@@ -138,6 +168,252 @@ class Population:
             
 #---------------------------------------------------------------------------------------------------
 """
+Class:  Population_array()
+
+     Array based description of a population (struct of arrays). Instead of one Person object per
+     inhabitant the person properties are kept in numpy arrays indexed by the person id, which
+     keeps the memory at a few bytes per person and allows to generate large populations fast.
+
+        status      - status per person (see Person)
+        day_i       - first day infected per person
+        day_r       - day the infection is over per person (see Person)
+        social      - index of the social type per person (into social_types)
+        graph       - Contact_graph the contacts are drawn from (None -> id offsets of the
+                      Social_type)
+
+     The infected, recovered and deceased ids are kept in Compartments and the infected are filed
+     in the calendar under the day they are done, so the daily bookkeeping scales with the number
+     of people changing their status.
+
+"""
+class Population_array(Population):
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self):
+        self.social_types = []
+        self.size = 0
+        self.status = numpy.zeros(0,dtype=numpy.int8)
+        self.day_i = numpy.zeros(0,dtype=numpy.int16)
+        self.day_r = numpy.zeros(0,dtype=numpy.int16)
+        self.social = numpy.zeros(0,dtype=numpy.int8)
+        self.infected = Compartment()
+        self.recovered = Compartment()
+        self.deceased = Compartment()
+        self.day = 0
+        self.calendar = Calendar_queue()
+        self.graph = None
+
+    #-----------------------------------------------------------------------------------------------
+    # make sure the arrays can hold at least n people (capacity grows by doubling)
+    #-----------------------------------------------------------------------------------------------
+    def reserve(self,n):
+        capacity = len(self.status)
+        if n <= capacity:
+            return
+        capacity = max(n,2*capacity)
+        for name in ('status','day_i','day_r','social'):
+            old = getattr(self,name)
+            new = numpy.zeros(capacity,dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self,name,new)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # index of the given social type (register it if not yet known)
+    #-----------------------------------------------------------------------------------------------
+    def social_index(self,social_type):
+        for i,st in enumerate(self.social_types):
+            if st is social_type:
+                return i
+        self.social_types.append(social_type)
+        return len(self.social_types)-1
+
+    #-----------------------------------------------------------------------------------------------
+    # add n susceptible people of the given social type in one go
+    #-----------------------------------------------------------------------------------------------
+    def add_people(self,n,social_type):
+        self.reserve(self.size+n)
+        self.social[self.size:self.size+n] = self.social_index(social_type)
+        self.size += n
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # build the contact graph for the people added so far and draw the contacts from it
+    #-----------------------------------------------------------------------------------------------
+    def set_graph(self,graph):
+        graph.build(self.social[:self.size],self.social_types)
+        self.graph = graph
+        return
+
+    def add_person(self,person):
+        id = self.size
+        self.add_people(1,person.social_type)
+        self.status[id] = person.status
+        if person.status == 1:
+            self.day_i[id] = self.day - person.n_days_i + 1
+            self.day_r[id] = self.day + max(int(numpy.floor(person.n_days_r-person.n_days_i)),0)
+            self.calendar.add(self.day_r[id],id)
+            self.infected.add(id)
+        elif person.status == -1:
+            self.recovered.add(id)
+        elif person.status == -2:
+            self.deceased.add(id)
+        return
+
+    def infect(self,id,corona):
+        # was removed?
+        if self.status[id] == -1:
+            self.recovered.remove(id)
+        if self.status[id] == -2:
+            self.deceased.remove(id)
+        # infect (from today on) and add to infected
+        self.infect_many(numpy.array([id]),corona.durations(1),self.day)
+
+    def expose(self,id,corona):
+        # is susceptible?
+        if self.status[id] != 0:
+            return
+
+        # expose the person (not infected so far)
+        if not corona.expose(0):
+            return
+
+        # infect the person (from tomorrow on)
+        self.infect_many(numpy.array([id]),corona.durations(1),self.day+1)
+
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # infect the given unique people from first_day on and file them under the day they are done
+    #-----------------------------------------------------------------------------------------------
+    def infect_many(self,ids,durations,first_day):
+        self.status[ids] = 1
+        self.day_i[ids] = first_day
+        self.day_r[ids] = done_day(first_day,durations)
+        self.calendar.add_many(self.day_r[ids],ids)
+        self.infected.add_many(ids)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # Spread for one day with all random numbers drawn in bulk for the infected people
+    #-----------------------------------------------------------------------------------------------
+    def spread(self,corona):
+
+        # people infected at the beginning of the day
+        n = self.n()
+        ids = self.infected.ids().copy()
+
+        # all contacts of today, separately for each social type
+        targets = []
+        for index,social_type in enumerate(self.social_types):
+            ids_type = ids[self.social[ids] == index]
+            if self.graph is not None:
+                targets.append(self.graph.contacts(ids_type,social_type))
+                continue
+            n_contacts,offsets = social_type.daily_exposures(len(ids_type))
+            targets.append((numpy.repeat(ids_type,n_contacts) + offsets) % n)
+        targets = numpy.concatenate(targets)
+
+        # expose the susceptible contacts (not infected so far), several successful exposures
+        # infect only once, from tomorrow on
+        targets = targets[self.status[targets] == 0]
+        targets = numpy.unique(targets[corona.expose_batch(numpy.zeros(len(targets)))])
+        self.infect_many(targets,corona.durations(len(targets)),self.day+1)
+
+        self.next_day(corona)
+
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # Spread for one day looping through the infected people one by one (reference for spread)
+    #-----------------------------------------------------------------------------------------------
+    def spread_serial(self,corona):
+
+        # people infected at the beginning of the day
+        n = self.n()
+        ids = self.infected.ids().copy()
+
+        # loop through infected people once
+        for id in ids:
+            social_type = self.social_types[self.social[id]]
+            for did in social_type.daily_exposure():
+                # expose this person
+                self.expose((id + did) % n,corona)
+
+        self.next_day(corona)
+
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # Propagate into the next day, the people done today die or recover (only they are touched,
+    # calendar entries of people infected again are outdated and skipped)
+    #-----------------------------------------------------------------------------------------------
+    def next_day(self,corona):
+
+        # remove people that are done: die or recover
+        done = self.calendar.pop(self.day)
+        done = numpy.unique(done[(self.status[done] == 1) & (self.day_r[done] == self.day)])
+        dead = numpy.random.uniform(0,1,len(done)) <= corona.death_rate
+        self.status[done] = numpy.where(dead,-2,-1)
+        self.infected.remove_many(done)
+        self.recovered.add_many(done[~dead])
+        self.deceased.add_many(done[dead])
+
+        self.day += 1
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # save the complete state to the directory (one .npy file per array, social types and the
+    # parameters of the contact graph pickled)
+    #-----------------------------------------------------------------------------------------------
+    def save(self,directory):
+        for name in ('status','day_i','day_r','social'):
+            numpy.save(os.path.join(directory,"%s.npy"%(name)),getattr(self,name)[:self.size])
+        for name in ('infected','recovered','deceased'):
+            getattr(self,name).save(directory,name)
+        self.calendar.save(directory,"calendar")
+        graph = None
+        if self.graph is not None:
+            self.graph.save(directory)
+            graph = (self.graph.n_links,self.graph.n_random,self.graph.ratio_random)
+        with open(os.path.join(directory,"population.pkl"),'wb') as f:
+            pickle.dump({ 'day': self.day, 'social_types': self.social_types, 'graph': graph },f,2)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # load the state saved in the directory, the arrays are memory mapped and only read when used,
+    # changes stay in memory (copy on write) so many runs can start from the same files
+    #-----------------------------------------------------------------------------------------------
+    def load(self,directory,mmap_mode='c'):
+        for name in ('status','day_i','day_r','social'):
+            setattr(self,name,numpy.load(os.path.join(directory,"%s.npy"%(name)),mmap_mode))
+        self.size = len(self.status)
+        for name in ('infected','recovered','deceased'):
+            getattr(self,name).load(directory,name,mmap_mode)
+        self.calendar.load(directory,"calendar")
+        with open(os.path.join(directory,"population.pkl"),'rb') as f:
+            state = pickle.load(f)
+        self.day = state['day']
+        self.social_types = state['social_types']
+        self.graph = None
+        if state.get('graph') is not None:
+            self.graph = Contact_graph(*state['graph'])
+            self.graph.load(directory)
+        return
+
+    def n(self):
+        return self.size
+
+    def show(self):
+        print("##\n Population of %d people (infected: %d)"%(self.n(),self.i()))
+        for id in range(self.n()):
+            print(" Person: %7d - [%s] (%d, %d, %d)"%\
+                (id,self.social_types[self.social[id]].summary(),
+                 self.status[id],self.day_i[id],self.day_r[id]))
+#---------------------------------------------------------------------------------------------------
+"""
 Class:  Social_type(avg_contact, n_family, n_work, ratio_family)
 
      Description of a social tpye relevant to the description of a population and their social
@@ -167,6 +443,14 @@ class Social_type:
         return " C:%s, NF:%d, NW:%d, RF:%f"%\
             (self.avg_contact.summary(),self.n_family,self.n_work,self.ratio_family)
 
+    #-----------------------------------------------------------------------------------------------
+    # Average number of encounters per day with other people (offset 0 is the person itself)
+    #-----------------------------------------------------------------------------------------------
+    def mean_contacts(self):
+        self_contact = self.ratio_family/float(self.n_family) + \
+                       (1.-self.ratio_family)/float(self.n_work)
+        return self.avg_contact.mean_int() * (1.-self_contact)
+
     #-----------------------------------------------------------------------------------------------
     # Return string of social type.
     #-----------------------------------------------------------------------------------------------
@@ -186,6 +470,24 @@ class Social_type:
 
         return ids
 
+    #-----------------------------------------------------------------------------------------------
+    # Return the encounters of n people for one day: number of encounters per person and the
+    # concatenated index offsets of all encounters (same distribution as daily_exposure).
+    #-----------------------------------------------------------------------------------------------
+    def daily_exposures(self,n):
+
+        # how many encounters today? (negative numbers mean no encounter)
+        n_contacts = numpy.maximum(self.avg_contact.sample(n).astype(int),0)
+
+        # now throw the indices for all encounters, family or work
+        nc = int(n_contacts.sum())
+        family = numpy.random.uniform(0,1,nc) < self.ratio_family
+        offsets = numpy.where(family,
+                              numpy.random.randint(0,self.n_family,nc),
+                              numpy.random.randint(0,self.n_work,nc))
+
+        return n_contacts,offsets
+
 #---------------------------------------------------------------------------------------------------
 """
 Class:  Person(id, social_type, status=0, n_days_i=0, n_days_r=0)
@@ -198,8 +500,9 @@ Class:  Person(id, social_type, status=0, n_days_i=0, n_days_r=0)
                       -1 recovered, not susceptible
                        0 susceptible
                        1 infected
-        n_days_i    - number of days infected
+        n_days_i    - number of days infected (only counted by next_day)
         n_days_r    - days infection lasts
+        day_r       - day of the population at the end of which the infection is over
 
 """
 class Person:
@@ -213,14 +516,16 @@ class Person:
         self.status = status
         self.n_days_i = n_days_i
         self.n_days_r = n_days_r
+        self.day_r = 0
         
     #-----------------------------------------------------------------------------------------------
     # Infect the person, which is saying person is infected and determine when completed
     #-----------------------------------------------------------------------------------------------
-    def infect(self,duration):
+    def infect(self,duration,day_r=0):
         self.status = 1
         self.n_days_i = 1
         self.n_days_r = duration
+        self.day_r = day_r
         return
 
     #-----------------------------------------------------------------------------------------------
@@ -255,26 +560,26 @@ class Person:
     def is_done(self,today,i_days):
         # check population status
         if popul.r()>=popul.n():
-            print "Day: %d (%s) == %s"%(i_days, today, popul.summary())
-            print ""
-            print " ==================="
-            print " Pathogen completed!"
-            print " ==================="
-            print " - duration %d days"%(i_days) 
-            print " - colletaral %s"%(popul.summary()) 
-            print ""
+            print("Day: %d (%s) == %s"%(i_days, today, popul.summary()))
+            print("")
+            print(" ===================")
+            print(" Pathogen completed!")
+            print(" ===================")
+            print(" - duration %d days"%(i_days)) 
+            print(" - colletaral %s"%(popul.summary())) 
+            print("")
             return True
             
         # check pathogen status
         if popul.i()<1:
-            print "Day: %d (%s) == %s"%(i_days, today, popul.summary())
-            print ""
-            print " ====================="
-            print " The pathogen is dead!"
-            print " ====================="
-            print " - duration %d days"%(i_days) 
-            print " - colletaral %s"%(popul.summary()) 
-            print ""
+            print("Day: %d (%s) == %s"%(i_days, today, popul.summary()))
+            print("")
+            print(" =====================")
+            print(" The pathogen is dead!")
+            print(" =====================")
+            print(" - duration %d days"%(i_days)) 
+            print(" - colletaral %s"%(popul.summary())) 
+            print("")
             return True
 
         return False
@@ -283,6 +588,6 @@ class Person:
     # Show what we have
     #-----------------------------------------------------------------------------------------------
     def show(self):
-        print " Person: %7d - [%s] (%d, %d, %d)"%\
-            (self.id,self.social_type.summary(),self.status,self.n_days_i,self.n_days_r)
+        print(" Person: %7d - [%s] (%d, %d, %d)"%\
+            (self.id,self.social_type.summary(),self.status,self.n_days_i,self.n_days_r))
         return
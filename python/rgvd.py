@@ -1,15 +1,18 @@
+import math
 import numpy
 
 #---------------------------------------------------------------------------------------------------
 """
-Class:  Rgvd(mean,std,positive=1)
+Class:  Rgvd(mean,std,positive=1,n_pool=10000)
 
      Description of a number that will be used to generate a Gaussian random distribution with a
-     mean and standard deviation.
+     mean and standard deviation. The random numbers are drawn in bulk into a pool, which is
+     refilled when used up.
 
         mean     - mean value
         std      - standard distribution
         positive - keep generating if not positive (=1) or allow negative value (=0).
+        n_pool   - number of random numbers drawn at once into the pool
 
 """
 class Rgvd:
@@ -17,11 +20,14 @@ class Rgvd:
     #-----------------------------------------------------------------------------------------------
     # constructor
     #-----------------------------------------------------------------------------------------------
-    def __init__(self,mean,std,positive):
+    def __init__(self,mean,std,positive,n_pool=10000):
 
         self.mean = mean
         self.std = std
         self.positive = positive
+        self.n_pool = n_pool
+        self.pool = numpy.zeros(0)
+        self.i_pool = 0
         
     #-----------------------------------------------------------------------------------------------
     # summary as a string
@@ -30,16 +36,63 @@ class Rgvd:
         return "V:%f+-%f"%(self.mean,self.std)
         
     #-----------------------------------------------------------------------------------------------
-    # get the next random number
+    # draw n random numbers (negative ones are drawn again if positive is requested)
     #-----------------------------------------------------------------------------------------------
-    def next(self):
-        rg = 0
-        active = True
-        while active:
-            rg = numpy.random.normal(self.mean, self.std, 1)
-            if self.positive:
-                if rg<0:
-                    break
-            active = False
+    def draw(self,n):
+        rg = numpy.random.normal(self.mean, self.std, n)
+        if self.positive:
+            negative = numpy.flatnonzero(rg<0)
+            while len(negative) > 0:
+                rg[negative] = numpy.random.normal(self.mean, self.std, len(negative))
+                negative = negative[rg[negative]<0]
             
         return rg
+
+    #-----------------------------------------------------------------------------------------------
+    # refill the pool of random numbers
+    #-----------------------------------------------------------------------------------------------
+    def fill(self):
+        self.pool = self.draw(self.n_pool)
+        self.i_pool = 0
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # get the next n random numbers (as an array)
+    #-----------------------------------------------------------------------------------------------
+    def sample(self,n):
+        # large requests do not need the pool
+        if n > self.n_pool:
+            return self.draw(n)
+        if self.i_pool + n > len(self.pool):
+            self.fill()
+        rg = self.pool[self.i_pool:self.i_pool+n]
+        self.i_pool += n
+        
+        return rg
+
+    #-----------------------------------------------------------------------------------------------
+    # get the next random number
+    #-----------------------------------------------------------------------------------------------
+    def next(self):
+        return self.sample(1)[0]
+
+    #-----------------------------------------------------------------------------------------------
+    # probability of a number below x (array), the Gaussian is truncated at 0 if positive
+    #-----------------------------------------------------------------------------------------------
+    def cdf(self,x):
+        x = numpy.asarray(x,dtype=float)
+        if self.std <= 0:
+            return (x > self.mean).astype(float)
+        erf = numpy.vectorize(math.erf)
+        phi = lambda x: 0.5*(1.+erf((x-self.mean)/(self.std*math.sqrt(2.))))
+        if not self.positive:
+            return phi(x)
+        phi0 = phi(0.)
+        return numpy.maximum(phi(x)-phi0,0.)/(1.-phi0)
+
+    #-----------------------------------------------------------------------------------------------
+    # mean of the integer part of the numbers (ex. number of contacts from avg_contact)
+    #-----------------------------------------------------------------------------------------------
+    def mean_int(self):
+        k = numpy.arange(1,int(self.mean+10*self.std)+2)
+        return float(numpy.sum(1.-self.cdf(k)))
@@ -0,0 +1,232 @@
+import copy
+import itertools
+import json
+import multiprocessing
+import os
+import numpy
+# Our stuff
+import deterministic
+import ensemble
+
+#---------------------------------------------------------------------------------------------------
+# chi2 of the simulated values compared to the data (only days with data count)
+#---------------------------------------------------------------------------------------------------
+def chi2(values,values_mc):
+    values = numpy.asarray(values,dtype=float)
+    values_mc = numpy.asarray(values_mc,dtype=float)
+    use = values > 0
+    delta = values[use] - values_mc[use]
+    return float(numpy.sum(delta*delta/values[use]))
+
+#---------------------------------------------------------------------------------------------------
+# numerical parameters of the simulation that no engine uses (all infect with the probability of
+# the first day of the infection, pi_initial)
+#---------------------------------------------------------------------------------------------------
+unused = ('pi_decay',)
+
+#---------------------------------------------------------------------------------------------------
+# names of the parameters that are not numerical parameters of the simulation (ex. typos) or that
+# are not used
+#---------------------------------------------------------------------------------------------------
+def unknown_parameters(simulation,parameters):
+    return [ p.name for p in parameters
+             if p.name in unused or not isinstance(vars(simulation).get(p.name),(int,float)) ]
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Scan(simulation,parameters,dates,values,seed=1000,cache="",n_proc=0,model="agent",latent=0.)
+
+     Scan of the simulation parameters to find the best agreement with the data measured by the
+     chi2. The simulation points are evaluated in a pool of processes and the chi2 per point is
+     cached in a file, so repeated scans skip the points that are already done.
+
+        simulation - the Simulation, parameters are set by their name (ex. pi_initial)
+        parameters - list of Parameters to scan (value, std, min and max are used)
+        dates      - dates of the data (datetime)
+        values     - data values per date (known infected)
+        seed       - seed used for all simulation points
+        cache      - file to cache the chi2 per point ("" -> no cache)
+        n_proc     - number of processes (0 -> one per core)
+        model      - agent (run the simulation) or a Compartmental model (age, sir or seir), which
+                     solves all points at once in this process (fast first pass)
+        latent     - mean latent days of the seir model
+        results    - chi2 for each point evaluated so far (point -> chi2)
+
+"""
+class Scan:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,simulation,parameters,dates,values,seed=1000,cache="",n_proc=0,model="agent",
+                 latent=0.):
+        unknown = unknown_parameters(simulation,parameters)
+        if len(unknown) > 0:
+            raise ValueError("unknown or unused simulation parameters: %s"%(",".join(unknown)))
+        self.simulation = simulation
+        self.parameters = parameters
+        self.data = {}
+        for date,value in zip(dates,values):
+            self.data[date.date()] = value
+        self.seed = seed
+        self.cache = cache
+        self.n_proc = n_proc
+        if self.n_proc < 1:
+            self.n_proc = multiprocessing.cpu_count()
+        self.model = model
+        self.latent = latent
+        self.results = {}
+        self.cached = {}
+        self.read_cache()
+
+    #-----------------------------------------------------------------------------------------------
+    # summary as a string
+    #-----------------------------------------------------------------------------------------------
+    def summary(self):
+        summary = " Scan: %d points evaluated"%(len(self.results))
+        for p in self.parameters:
+            summary += "\n %s"%(p.summary())
+        return summary
+
+    #-----------------------------------------------------------------------------------------------
+    # value of a parameter with the type of the simulation parameter (integer parameters like n_days
+    # are scanned on integers)
+    #-----------------------------------------------------------------------------------------------
+    def cast(self,name,value):
+        if isinstance(getattr(self.simulation,name),int):
+            return int(round(value))
+        return float(value)
+
+    #-----------------------------------------------------------------------------------------------
+    # simulation for the given point (tuple of values in the order of the parameters)
+    #-----------------------------------------------------------------------------------------------
+    def point_simulation(self,point):
+        simulation = copy.copy(self.simulation)
+        for p,value in zip(self.parameters,point):
+            setattr(simulation,p.name,value)
+        return simulation
+
+    #-----------------------------------------------------------------------------------------------
+    # key identifying the point in the cache (full simulation setup and seed)
+    #-----------------------------------------------------------------------------------------------
+    def key(self,point):
+        setup = self.point_simulation(point).__dict__.copy()
+        setup['seed'] = self.seed
+        if self.model != "agent":
+            setup['model'] = self.model
+            setup['latent'] = self.latent
+        return json.dumps(setup,sort_keys=True)
+
+    def read_cache(self):
+        if self.cache == "" or not os.path.exists(self.cache):
+            return
+        with open(self.cache,'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.cached[entry['key']] = entry['chi2']
+        return
+
+    def write_cache(self,point,chi2):
+        if self.cache == "":
+            return
+        with open(self.cache,'a') as f:
+            f.write(json.dumps({'key': self.key(point), 'chi2': chi2})+"\n")
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # chi2 of one simulation history compared to the data (simulated known infected only, with the
+    # ratio of unknown infections of the point)
+    #-----------------------------------------------------------------------------------------------
+    def chi2(self,history,r_unknown):
+        values = []
+        values_mc = []
+        for date,n_infected in zip(history.dates,history.infected):
+            if date.date() in self.data:
+                values.append(self.data[date.date()])
+                values_mc.append(n_infected/float(r_unknown))
+        return chi2(values,values_mc)
+
+    #-----------------------------------------------------------------------------------------------
+    # evaluate the given points (cached points are not run again)
+    #-----------------------------------------------------------------------------------------------
+    def evaluate(self,points):
+        todo = []
+        for point in points:
+            if point in self.results or point in todo:
+                continue
+            key = self.key(point)
+            if key in self.cached:
+                self.results[point] = self.cached[key]
+            else:
+                todo.append(point)
+
+        if len(todo) > 0 and self.model != "agent":
+            simulations = [ self.point_simulation(point) for point in todo ]
+            histories = deterministic.from_simulations(simulations,self.model,
+                                                       self.latent).histories()
+            for point,simulation,history in zip(todo,simulations,histories):
+                self.results[point] = self.chi2(history,simulation.r_unknown)
+                self.write_cache(point,self.results[point])
+        elif len(todo) > 0:
+            jobs = [ (self.point_simulation(point),self.seed,"") for point in todo ]
+            pool = multiprocessing.Pool(min(self.n_proc,len(jobs)))
+            try:
+                histories = pool.map(ensemble.run_member,jobs,chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+            for point,(simulation,seed,record),history in zip(todo,jobs,histories):
+                self.results[point] = self.chi2(history,simulation.r_unknown)
+                self.write_cache(point,self.results[point])
+
+        return [ self.results[point] for point in points ]
+
+    #-----------------------------------------------------------------------------------------------
+    # best point so far (sets the parameter values)
+    #-----------------------------------------------------------------------------------------------
+    def best(self):
+        point = min(self.results,key=self.results.get)
+        for p,value in zip(self.parameters,point):
+            p.value = value
+        return point,self.results[point]
+
+    #-----------------------------------------------------------------------------------------------
+    # regular grid of n points per parameter in its range [min,max]
+    #-----------------------------------------------------------------------------------------------
+    def grid(self,n=5):
+        axes = []
+        for p in self.parameters:
+            axis = [ self.cast(p.name,p.value) ]
+            if p.max > p.min and n > 1:
+                axis = []
+                for x in numpy.linspace(p.min,p.max,n):
+                    x = self.cast(p.name,round(float(x),10))
+                    if x not in axis:
+                        axis.append(x)
+            axes.append(axis)
+        points = list(itertools.product(*axes))
+        self.evaluate(points)
+        return self.best()
+
+    #-----------------------------------------------------------------------------------------------
+    # adaptive search: evaluate the neighbours (value -+ step) of the best point, move to the best
+    # one and halve the steps when the best point stays the same (steps start at std)
+    #-----------------------------------------------------------------------------------------------
+    def adaptive(self,n_iter=10):
+        steps = [ p.std for p in self.parameters ]
+        best = tuple([ self.cast(p.name,p.value) for p in self.parameters ])
+        for i in range(n_iter):
+            axes = []
+            for p,value,step in zip(self.parameters,best,steps):
+                axis = [ value ]
+                for x in (round(value-step,10),round(value+step,10)):
+                    x = self.cast(p.name,x)
+                    if step > 0 and x not in axis and (p.max <= p.min or p.min <= x <= p.max):
+                        axis.append(x)
+                axes.append(axis)
+            self.evaluate(list(itertools.product(*axes)))
+            point,chi2 = self.best()
+            if point == best:
+                steps = [ step/2. for step in steps ]
+            best = point
+        return self.best()
@@ -0,0 +1,250 @@
+import datetime
+import numpy
+# Our stuff
+import history
+import rgvd
+import pathogen
+import population
+import cohort
+import snapshot
+import contact_graph
+
+#---------------------------------------------------------------------------------------------------
+# directory of the checkpoints of a run recorded to record
+#---------------------------------------------------------------------------------------------------
+def checkpoint_dir(record):
+    return "%s_checkpoint"%(record)
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Simulation(n_popul,i_initial,n_days,reco_mean,reco_std,pi_initial,pi_decay,death_rate,
+                   exposure_avg,exposure_std,date,engine="person",r_unknown=4,start="",social=None,
+                   graph=None)
+
+     Complete setup of one outbreak simulation, so it can be run for any seed (also in another
+     process) and results in the History of the outbreak.
+
+        n_popul      - number of people in the population
+        i_initial    - number of known infected people at the start
+        n_days       - maximum number of days to simulate
+        reco_mean    - mean of the infection duration
+        reco_std     - standard deviation of the infection duration
+        pi_initial   - initial infection probability on exposure
+        pi_decay     - decay of infection probability per day
+        death_rate   - rate of death when infected
+        exposure_avg - average number of contacts per day
+        exposure_std - standard deviation of the number of contacts per day
+        date         - date of the start (%Y-%m-%d)
+        engine       - population implementation (person, array or cohort)
+        r_unknown    - ratio of all infected to known infected people
+        start        - snapshot directory to start from ("" -> new population), the run continues
+                       the snapshot exactly for the seed that made it and branches off for others
+        social       - social types mixed in the population, list of (fraction, n_family, n_work,
+                       ratio_family) (None -> one type: 4 family members, 200 colleagues, 10% of
+                       the contacts with the family)
+        graph        - contacts drawn from a Contact_graph with the parameters (n_links, n_random,
+                       ratio_random) (None -> id offsets, array engine only)
+
+"""
+class Simulation:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,n_popul,i_initial,n_days,reco_mean,reco_std,pi_initial,pi_decay,death_rate,
+                 exposure_avg,exposure_std,date,engine="person",r_unknown=4,start="",social=None,
+                 graph=None):
+        self.n_popul = n_popul
+        self.i_initial = i_initial
+        self.n_days = n_days
+        self.reco_mean = reco_mean
+        self.reco_std = reco_std
+        self.pi_initial = pi_initial
+        self.pi_decay = pi_decay
+        self.death_rate = death_rate
+        self.exposure_avg = exposure_avg
+        self.exposure_std = exposure_std
+        self.date = date
+        self.engine = engine
+        self.r_unknown = r_unknown
+        self.start = start
+        self.social = social
+        if self.social is None:
+            self.social = [ (1.,4,200,0.1) ]
+        self.graph = graph
+
+    #-----------------------------------------------------------------------------------------------
+    # summary as a string
+    #-----------------------------------------------------------------------------------------------
+    def summary(self):
+        summary = " Simulation: n=%d, i_initial=%d, n_days=%d, engine=%s, start=%s"%\
+            (self.n_popul,self.i_initial,self.n_days,self.engine,self.date)
+        if self.start != "":
+            summary += ", snapshot=%s"%(self.start)
+        if len(self.social) > 1:
+            summary += ", social types=%d"%(len(self.social))
+        if self.graph is not None:
+            summary += ", graph=%s"%(":".join([ str(p) for p in self.graph ]))
+        return summary
+
+    #-----------------------------------------------------------------------------------------------
+    # the pathogen and the social types of the simulation, (fraction, Social_type) each, and the
+    # mean number of contacts per day of the mix (as Population_cohort.contacts)
+    #-----------------------------------------------------------------------------------------------
+    def pathogen(self):
+        return pathogen.Pathogen(rgvd.Rgvd(self.reco_mean,self.reco_std,1),
+                                 self.pi_initial,self.pi_decay,self.death_rate)
+
+    def social_types(self):
+        return [ (fraction,population.Social_type(rgvd.Rgvd(self.exposure_avg,self.exposure_std,1),
+                                                  n_family,n_work,ratio_family))
+                 for fraction,n_family,n_work,ratio_family in self.social ]
+
+    def mean_contacts(self):
+        social_types = self.social_types()
+        contacts = sum([ fraction*st.mean_contacts() for fraction,st in social_types ])
+        return contacts/sum([ fraction for fraction,st in social_types ])
+
+    #-----------------------------------------------------------------------------------------------
+    # generate the healthy population (consecutive ids for each social type)
+    #-----------------------------------------------------------------------------------------------
+    def population(self,social_types):
+        fractions = numpy.array([ fraction for fraction,social_type in social_types ],dtype=float)
+        ends = numpy.rint(numpy.cumsum(fractions)/fractions.sum()*self.n_popul).astype(int)
+        counts = numpy.diff(numpy.concatenate(([0],ends)))
+        if self.engine == "array":
+            popul = population.Population_array()
+            for n,(fraction,social_type) in zip(counts,social_types):
+                popul.add_people(int(n),social_type)
+            if self.graph is not None:
+                popul.set_graph(contact_graph.Contact_graph(*self.graph))
+        elif self.engine == "cohort":
+            popul = cohort.Population_cohort()
+            for n,(fraction,social_type) in zip(counts,social_types):
+                popul.add_people(int(n),social_type)
+        else:
+            id = 0
+            popul = population.Population()
+
+            for n,(fraction,social_type) in zip(counts,social_types):
+                for i in range(n):
+                    p = population.Person(id,social_type)
+                    popul.add_person(p)
+
+                    id += 1 # increase index for the next person
+        return popul
+
+    #-----------------------------------------------------------------------------------------------
+    # new history of a run, streamed days are not kept in memory
+    #-----------------------------------------------------------------------------------------------
+    def history(self,record,stream):
+        hist = history.History(record,keep=not stream)
+        if stream:
+            hist.open_stream()
+        return hist
+
+    #-----------------------------------------------------------------------------------------------
+    # initial state of a run: population, pathogen, history, number of days and date
+    #-----------------------------------------------------------------------------------------------
+    def initial_state(self,seed,record,quiet,stream):
+
+        corona = self.pathogen()
+        social_types = self.social_types()
+        numpy.random.seed(seed=int(seed))
+
+        # Generate the population
+        popul = self.population(social_types)
+        if not quiet:
+            print("Day: %d  == %s"%(-1, popul.summary()))
+
+        # Generate an infection in the healthy population (no ids to pick for cohorts)
+        n = popul.n()
+        if self.engine == "cohort":
+            popul.infect_many(self.i_initial * self.r_unknown - popul.i())
+        while (popul.i() < self.i_initial * self.r_unknown):
+            id = numpy.random.randint(0,n)
+            popul.infect(id,corona)
+        if not quiet:
+            print("Day: %d == %s"%(0, popul.summary()))
+
+        hist = self.history(record,stream)
+        today = datetime.datetime.strptime(self.date, "%Y-%m-%d")
+        return popul,corona,hist,0,today
+
+    #-----------------------------------------------------------------------------------------------
+    # state of a run starting from the snapshot (pathogen and social type only taken over if they
+    # are unchanged, so parameter studies can branch off the same snapshot)
+    #-----------------------------------------------------------------------------------------------
+    def snapshot_state(self,seed,record,quiet,stream):
+
+        popul,state = snapshot.Snapshot(self.start).load()
+        corona = self.pathogen()
+        if corona.summary() == state['pathogen'].summary():
+            corona = state['pathogen']
+        social_types = [ social_type for fraction,social_type in self.social_types() ]
+        if len(popul.social_types) == len(social_types) and \
+           [ st.summary() for st in social_types ] != [ st.summary() for st in popul.social_types ]:
+            popul.social_types = social_types
+        if int(seed) == state['seed']:
+            numpy.random.set_state(state['random'])
+        else:
+            numpy.random.seed(seed=int(seed))
+        if not quiet:
+            print("Day: %d == %s (snapshot: %s)"%(state['i_days'], popul.summary(), self.start))
+
+        hist = self.history(record,stream)
+        hist.set_days(state['history'])
+        return popul,corona,hist,state['i_days'],state['today']
+
+    #-----------------------------------------------------------------------------------------------
+    # run the simulation for the given seed and return its history
+    #
+    #   save       - snapshot directory for the state at the start of day save_day ("" -> none)
+    #   checkpoint - save the state every checkpoint days to <record>_checkpoint (0 -> never), a
+    #                run started from there resumes the run exactly (same seed)
+    #   stream     - stream the history to <record>_stream.csv instead of keeping it in memory
+    #-----------------------------------------------------------------------------------------------
+    def run(self,seed,record="",quiet=False,save="",save_day=0,checkpoint=0,stream=False):
+
+        if self.start != "":
+            popul,corona,hist,i_days,today = self.snapshot_state(seed,record,quiet,stream)
+        else:
+            popul,corona,hist,i_days,today = self.initial_state(seed,record,quiet,stream)
+        first_day = i_days
+
+        # Propagate our spreading model
+        if not quiet:
+            print(" Corona virus: %s"%(corona.summary()))
+        while (i_days<self.n_days):
+
+            # snapshot of the state at the start of the day
+            if save != "" and i_days == save_day:
+                snapshot.Snapshot(save).save(popul,corona,hist,int(seed),i_days,today)
+                if not quiet:
+                    print("Day: %d (%s) == snapshot saved to %s"%(i_days, today, save))
+            if checkpoint > 0 and i_days % checkpoint == 0 and i_days != first_day:
+                snapshot.Snapshot(checkpoint_dir(record)).save(popul,corona,hist,int(seed),i_days,
+                                                               today)
+
+            # record history
+            hist.add_day(today,popul.i(),popul.r(),popul.d())
+            if not quiet:
+                print("Day: %d (%s) == %s"%(i_days, today, popul.summary()))
+
+            # spread and check whether it is still active
+            popul.spread(corona)
+
+            # increase the day
+            i_days += 1
+            today = today + datetime.timedelta(days=1)
+            if not popul.is_active(today,i_days):
+                hist.add_day(today,popul.i(),popul.r(),popul.d())
+                hist.close_stream()
+                return hist
+
+        # completed all steps of the simulation but pathogen is still active
+        if not quiet:
+            print("Day: %d (%s) == %s"%(i_days, today, popul.summary()))
+        hist.close_stream()
+
+        return hist
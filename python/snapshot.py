@@ -0,0 +1,70 @@
+import os
+import pickle
+import shutil
+import numpy
+# Our stuff
+import population
+
+#---------------------------------------------------------------------------------------------------
+"""
+Class:  Snapshot(directory)
+
+     State of a simulation at the start of one day saved to a directory, so runs can start from it
+     instead of generating the population and simulating the days before. The population arrays
+     are plain .npy files that are memory mapped when loading (copy on write, the files are never
+     changed), the rest of the state is pickled in state.pkl:
+
+        seed      - seed of the run that made the snapshot
+        i_days    - number of days simulated
+        today     - date of the day
+        random    - state of the numpy random generator
+        pathogen  - the Pathogen (with its pool of random numbers)
+        history   - the days of the History up to the day (dates, infected, recovered, deceased)
+
+     The population has to be a Population_array. A snapshot is written to a temporary directory
+     first and then moved in place, so an existing snapshot is only replaced by a complete one.
+
+"""
+class Snapshot:
+
+    #-----------------------------------------------------------------------------------------------
+    # constructor
+    #-----------------------------------------------------------------------------------------------
+    def __init__(self,directory):
+        self.directory = directory
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory,"state.pkl"))
+
+    #-----------------------------------------------------------------------------------------------
+    # save the state of the run
+    #-----------------------------------------------------------------------------------------------
+    def save(self,popul,corona,hist,seed,i_days,today):
+        if not isinstance(popul,population.Population_array):
+            raise ValueError("snapshots need the array population (engine=array)")
+
+        tmp = self.directory.rstrip("/")+".tmp"
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+
+        popul.save(tmp)
+        state = { 'seed': seed, 'i_days': i_days, 'today': today,
+                  'random': numpy.random.get_state(), 'pathogen': corona, 'history': hist.days() }
+        with open(os.path.join(tmp,"state.pkl"),'wb') as f:
+            pickle.dump(state,f,2)
+
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        os.rename(tmp,self.directory)
+        return
+
+    #-----------------------------------------------------------------------------------------------
+    # load the state, returns the population and the dictionary of the other state
+    #-----------------------------------------------------------------------------------------------
+    def load(self,mmap_mode='c'):
+        popul = population.Population_array()
+        popul.load(self.directory,mmap_mode)
+        with open(os.path.join(self.directory,"state.pkl"),'rb') as f:
+            state = pickle.load(f)
+        return popul,state
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules live in python/ (as with PYTHONPATH=python for the scripts)
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),"python"))
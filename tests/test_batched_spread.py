@@ -0,0 +1,36 @@
+import numpy
+# Our stuff
+import population
+import rgvd
+import simulation
+
+def test_daily_exposures_like_daily_exposure():
+    social_type = population.Social_type(rgvd.Rgvd(7,3,1),4,200,0.1)
+    numpy.random.seed(1)
+    n_contacts,offsets = social_type.daily_exposures(20000)
+    assert len(n_contacts) == 20000 and n_contacts.sum() == len(offsets)
+    assert offsets.min() >= 0 and offsets.max() < 200
+    serial = [ social_type.daily_exposure() for i in range(20000) ]
+    assert abs(n_contacts.mean()-numpy.mean([ len(ids) for ids in serial ])) < 0.1
+    # family offsets (below 4) are 10% of the contacts plus the work offsets that are that small
+    family = 0.1 + 0.9*4/200.
+    assert abs(numpy.mean(offsets < 4)-family) < 0.01
+
+#---------------------------------------------------------------------------------------------------
+# infected, recovered and deceased after some days of spreading from the same start
+#---------------------------------------------------------------------------------------------------
+def spread_days(serial,seed,n_days=12):
+    sim = simulation.Simulation(10000,25,n_days,10,4,0.03,0,0.05,7,3,"2020-03-31","array")
+    popul,corona,hist,i_days,today = sim.initial_state(seed,"",True,False)
+    for day in range(n_days):
+        if serial:
+            popul.spread_serial(corona)
+        else:
+            popul.spread(corona)
+    return popul.i()+popul.r()+popul.d()
+
+def test_batched_spread_agrees_with_serial_spread():
+    batched = numpy.mean([ spread_days(False,seed) for seed in range(6) ])
+    serial = numpy.mean([ spread_days(True,seed) for seed in range(6) ])
+    assert batched > 500
+    assert abs(batched/serial-1.) < 0.15
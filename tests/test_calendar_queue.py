@@ -0,0 +1,43 @@
+import numpy
+# Our stuff
+from calendar_queue import Calendar_queue
+import population
+import rgvd
+import pathogen
+
+def test_ids_come_out_on_their_day():
+    calendar = Calendar_queue()
+    calendar.add(3,7)
+    calendar.add_many(numpy.array([ 5,3,5,9 ]),numpy.array([ 1,2,4,8 ]))
+    assert len(calendar) == 5
+    assert sorted(calendar.pop(3)) == [ 2,7 ]
+    assert len(calendar.pop(3)) == 0
+    assert len(calendar.pop(4)) == 0
+    assert sorted(calendar.pop(5)) == [ 1,4 ]
+    assert calendar.pop(5).dtype == numpy.int32
+    assert len(calendar) == 1
+
+def test_save_and_load(tmpdir):
+    calendar = Calendar_queue()
+    calendar.add_many(numpy.array([ 2,2,6 ]),numpy.array([ 10,11,12 ]))
+    calendar.add(6,13)
+    calendar.save(str(tmpdir),"calendar")
+    loaded = Calendar_queue()
+    loaded.load(str(tmpdir),"calendar")
+    assert sorted(loaded.pop(2)) == [ 10,11 ]
+    assert sorted(loaded.pop(6)) == [ 12,13 ]
+    assert len(loaded) == 0
+
+def test_outdated_entries_are_skipped():
+    popul = population.Population_array()
+    popul.add_people(10,population.Social_type(rgvd.Rgvd(5,1,1),4,10,0.5))
+    corona = pathogen.Pathogen(rgvd.Rgvd(3,0.,1),0.,0.,0.)
+    popul.infect(4,corona)
+    # infected again (as the initial infections may): only the new plan counts
+    popul.next_day(corona)
+    popul.infect(4,corona)
+    assert sorted(popul.calendar.buckets.keys()) == [ 2,3 ]
+    for day in range(3):
+        popul.next_day(corona)
+        assert popul.i() == (1 if day < 2 else 0)
+    assert popul.r() == 1 and popul.status[4] == -1
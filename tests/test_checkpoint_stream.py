@@ -0,0 +1,37 @@
+import csv
+import os
+# Our stuff
+import simulation
+import snapshot
+
+def make_simulation(start=""):
+    return simulation.Simulation(10000,25,20,10,4,0.03,0,0.05,7,3,"2020-03-31","array",4,start)
+
+def test_streamed_history(tmpdir):
+    record = str(tmpdir.join("rec"))
+    expected = make_simulation().run(2,quiet=True).days()
+    hist = make_simulation().run(2,record,quiet=True,stream=True)
+    assert hist.dates == []
+    assert hist.days() == expected
+    with open(record+"_stream.csv") as f:
+        lines = f.readlines()
+    assert lines[0] == "Date,Infected,Recovered,Deceased\n"
+    assert len(lines) == len(expected[0])+1
+
+    # the _SIMUS files are written from the stream
+    hist.write()
+    with open(record+"_confirmed_SIMUS.csv") as f:
+        header,row = list(csv.reader(f))
+    assert row[11:] == [ str(n) for n in expected[1] ]
+
+def test_resume_from_checkpoint(tmpdir):
+    record = str(tmpdir.join("rec"))
+    expected = make_simulation().run(2,record,quiet=True,checkpoint=5).days()
+    directory = simulation.checkpoint_dir(record)
+    loaded,state = snapshot.Snapshot(directory).load()
+    assert state['i_days'] == 15
+
+    # as after a crash after the last checkpoint: the resumed run ends like the uninterrupted one
+    resumed = make_simulation(directory).run(2,record,quiet=True,checkpoint=5,stream=True)
+    assert resumed.days() == expected
+    assert not os.path.exists(directory+".tmp")
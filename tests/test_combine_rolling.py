@@ -0,0 +1,42 @@
+import numpy
+# Our stuff
+import data_ts
+
+def make_data(n_days=10):
+    data = data_ts.Data_ts("data")
+    data.set_times([ "3/%d/20"%(i+1) for i in range(n_days) ])
+    data.infected = data_ts.Series(tags=[ "Germany","France" ],
+                                   matrix=numpy.array([ numpy.arange(n_days)**2,
+                                                        numpy.arange(n_days)*3+1 ]))
+    return data
+
+#---------------------------------------------------------------------------------------------------
+# rolling sum or mean over the last nroll days, one day at a time
+#---------------------------------------------------------------------------------------------------
+def rolling(values,nroll,mean):
+    result = []
+    for i in range(len(values)):
+        window = values[max(0,i+1-nroll):i+1]
+        result.append(sum(window)/float(len(window)) if mean else sum(window))
+    return result
+
+def test_combine_keeps_every_nth_day_from_the_last():
+    data = make_data()
+    data.combine_values(3)
+    assert data.times == [ "3/1/20","3/4/20","3/7/20","3/10/20" ]
+    assert list(data.infected["Germany"]) == [ 0,9,36,81 ]
+    assert list(data.dates) == list(data_ts.parse_dates(data.times))
+    assert len(data.deceased) == 0
+
+def test_rolling_mean_and_sum():
+    for mean in (True,False):
+        data = make_data()
+        expected = [ rolling(list(data.infected[tag]),4,mean) for tag in data.infected ]
+        data.rolling_values(4,mean)
+        for tag,values in zip(data.infected,expected):
+            assert numpy.allclose(data.infected[tag],values)
+        assert len(data.times) == 10
+
+    data = make_data()
+    data.rolling_values(1)
+    assert list(data.infected["France"]) == list(make_data().infected["France"])
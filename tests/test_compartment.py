@@ -0,0 +1,51 @@
+import numpy
+# Our stuff
+from compartment import Compartment
+
+#---------------------------------------------------------------------------------------------------
+# members and positions agree with the set of ids the compartment should hold
+#---------------------------------------------------------------------------------------------------
+def check(compartment,expected):
+    ids = compartment.ids()
+    assert len(compartment) == len(expected)
+    assert sorted(ids.tolist()) == sorted(expected)
+    assert (compartment.position[ids] == numpy.arange(len(ids))).all()
+    assert (compartment.position >= 0).sum() == len(expected)
+
+def test_add_and_remove():
+    compartment = Compartment()
+    for id in (5,3,9,3):
+        compartment.add(id)
+    compartment.remove(5)
+    compartment.remove(42)
+    check(compartment,[ 3,9 ])
+    assert 9 in compartment and 5 not in compartment and 42 not in compartment
+
+def test_remove_many_invariants():
+    numpy.random.seed(3)
+    compartment = Compartment(1000)
+    expected = set()
+    for step in range(200):
+        ids = numpy.unique(numpy.random.randint(0,1200,numpy.random.randint(0,50)))
+        if step % 3 == 0:
+            compartment.remove_many(ids)
+            expected -= set(ids.tolist())
+        else:
+            compartment.add_many(ids)
+            expected |= set(ids.tolist())
+        check(compartment,list(expected))
+
+    # removing everything (also ids that are not in) empties the compartment
+    compartment.remove_many(numpy.arange(1300))
+    check(compartment,[])
+
+def test_save_and_load(tmpdir):
+    compartment = Compartment()
+    compartment.add_many(numpy.array([ 7,2,11 ]))
+    compartment.save(str(tmpdir),"infected")
+    loaded = Compartment()
+    loaded.load(str(tmpdir),"infected")
+    check(loaded,[ 2,7,11 ])
+    loaded.remove(7)
+    loaded.add(4)
+    check(loaded,[ 2,4,11 ])
@@ -0,0 +1,115 @@
+import numpy
+# Our stuff
+import data_ts
+
+#---------------------------------------------------------------------------------------------------
+# data directory with (empty) input files, only their size and time go into the cache key
+#---------------------------------------------------------------------------------------------------
+def make_data(tmpdir):
+    data = data_ts.Data_ts(str(tmpdir))
+    for f in data.input_files_infected+data.input_files_deceased+[data.input_file_pop]:
+        tmpdir.join(f).write("")
+    return data
+
+#---------------------------------------------------------------------------------------------------
+# data directory with small global and US files of the given countries and states
+#---------------------------------------------------------------------------------------------------
+def write_files(tmpdir,countries,states,n_days=3):
+    days = ",".join([ "3/%d/20"%(25+i) for i in range(n_days) ])
+    values = ",".join([ str(10*(i+1)) for i in range(n_days) ])
+    for kind in ("confirmed","deaths"):
+        lines = [ "Province/State,Country/Region,Lat,Long,"+days ]
+        lines += [ ",%s,0,0,%s"%(country,values) for country in countries ]
+        tmpdir.join("time_series_covid19_%s_global.csv"%kind).write("\n".join(lines)+"\n")
+        population = ",Population" if kind == "deaths" else ""
+        lines = [ "UID,iso2,iso3,code3,FIPS,Admin2,Province_State,Country_Region,Lat,Long_,"
+                  "Combined_Key"+population+","+days ]
+        population = ",1000" if kind == "deaths" else ""
+        lines += [ "1,US,USA,840,1.0,A,%s,US,0,0,x%s,%s"%(state,population,values)
+                   for state in states ]
+        tmpdir.join("time_series_covid19_%s_US.csv"%kind).write("\n".join(lines)+"\n")
+    tmpdir.join("populations.csv").write("1,Germany,83000000\n2,France,67000000\n")
+    return data_ts.Data_ts(str(tmpdir))
+
+def test_cache_round_trip(tmpdir):
+    data = make_data(tmpdir)
+    data.set_times([ "1/22/20","1/23/20" ])
+    data.infected = data_ts.Series(tags=[ "Germany","France" ],matrix=numpy.array([[1,2],[3,4]]))
+    data.deceased = data_ts.Series(tags=[ "Germany" ],matrix=numpy.array([[0,1]]))
+    data.population = { "Germany": 83000000, "France": 67000000 }
+    data.write_cache(quiet=True)
+
+    cached = data_ts.Data_ts(str(tmpdir))
+    assert cached.read_cache(quiet=True)
+    assert cached.times == [ "1/22/20","1/23/20" ]
+    assert list(cached.infected.tags) == [ "Germany","France" ]
+    assert list(cached.infected["France"]) == [ 3,4 ]
+    assert cached.population == data.population
+
+def test_cache_with_byte_strings(tmpdir):
+    data = make_data(tmpdir)
+    tags = [ u"Germany",u"Côte d'Ivoire" ]
+    # a cache as python 2 writes it: all strings are byte strings (dtype S)
+    numpy.savez(str(tmpdir.join(data.cache_file)),
+                key=numpy.array([ data.cache_key().encode('utf-8') ]),
+                times=numpy.array([ b"1/22/20",b"1/23/20" ]),
+                infected_tags=numpy.array([ tag.encode('utf-8') for tag in tags ]),
+                infected=numpy.array([[1,2],[3,4]]),
+                deceased_tags=numpy.array([ b"Germany" ]),
+                deceased=numpy.array([[0,1]]),
+                population_tags=numpy.array([ b"Germany" ]),
+                population=numpy.array([ 83000000 ]))
+    assert numpy.load(str(tmpdir.join(data.cache_file)))['times'].dtype.kind == 'S'
+
+    cached = data_ts.Data_ts(str(tmpdir))
+    assert cached.read_cache(quiet=True)
+    assert cached.times == [ "1/22/20","1/23/20" ]
+    assert list(data_ts.parse_dates(cached.times)) == \
+        [ numpy.datetime64("2020-01-22"),numpy.datetime64("2020-01-23") ]
+    assert list(cached.infected.tags) == tags
+    assert list(cached.infected[tags[1]]) == [ 3,4 ]
+    assert cached.population == { "Germany": 83000000 }
+
+def test_selective_load_writes_the_full_cache(tmpdir):
+    data = write_files(tmpdir,[ "Germany","France" ],[ "Vermont" ])
+    data.load_data(quiet=True,tags=[ "Germany" ],kinds=('infected',))
+    assert list(data.infected.tags) == [ "Germany" ]
+    assert len(data.deceased) == 0
+
+    cached = data_ts.Data_ts(str(tmpdir))
+    assert cached.read_cache(quiet=True)
+    assert sorted(cached.infected.tags) == [ "France","Germany","Vermont" ]
+    assert sorted(cached.deceased.tags) == [ "France","Germany","Vermont" ]
+
+def test_selective_load_rebuilds_the_cache(tmpdir):
+    write_files(tmpdir,[ "Germany" ],[ "Vermont" ]).load_data(quiet=True)
+    # a new country: the new days can not just be appended
+    write_files(tmpdir,[ "Germany","France" ],[ "Vermont" ],n_days=4)
+    data = data_ts.Data_ts(str(tmpdir))
+    data.load_data(quiet=True,tags=[ "France" ],kinds=('deceased',))
+    assert list(data.deceased.tags) == [ "France" ]
+    assert list(data.deceased[ "France" ]) == [ 10,20,30,40 ]
+
+    cached = data_ts.Data_ts(str(tmpdir))
+    assert cached.read_cache(quiet=True)
+    assert sorted(cached.infected.tags) == [ "France","Germany","Vermont" ]
+    assert len(cached.times) == 4
+
+def test_new_days_are_appended(tmpdir,monkeypatch):
+    write_files(tmpdir,[ "Germany","France" ],[ "Vermont" ]).load_data(quiet=True)
+    write_files(tmpdir,[ "Germany","France" ],[ "Vermont" ],n_days=5)
+
+    # only the new days are read, not the files as a whole
+    def read_file(*args,**kwargs):
+        raise AssertionError("read_file called")
+    monkeypatch.setattr(data_ts.Data_ts,"read_file",read_file)
+    data = data_ts.Data_ts(str(tmpdir))
+    data.load_data(quiet=True)
+    assert data.times == [ "3/25/20","3/26/20","3/27/20","3/28/20","3/29/20" ]
+    assert list(data.infected["Vermont"]) == [ 10,20,30,40,50 ]
+    assert list(data.deceased["France"]) == [ 10,20,30,40,50 ]
+    assert list(data.dates)[-1] == numpy.datetime64("2020-03-29")
+
+    cached = data_ts.Data_ts(str(tmpdir))
+    assert cached.read_cache(quiet=True)
+    assert len(cached.times) == 5
@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+import numpy
+try:
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import urlopen,HTTPError
+# Our stuff
+import data_server
+from test_data_cache import write_files
+
+#---------------------------------------------------------------------------------------------------
+# data server of small files on a free port in a background thread
+#---------------------------------------------------------------------------------------------------
+def start(tmpdir):
+    write_files(tmpdir,[ "Germany","France","Atlantis" ],[ "Vermont" ])
+    server = data_server.Data_server(str(tmpdir),"127.0.0.1",0,refresh=0,update=False,quiet=True)
+    thread = threading.Thread(target=server.serve)
+    thread.daemon = True
+    thread.start()
+    for i in range(500):
+        if server.server is not None:
+            break
+        time.sleep(0.01)
+    return server
+
+def get(server,query):
+    try:
+        response = urlopen("http://127.0.0.1:%d%s"%(server.port,query),timeout=5)
+        code = response.getcode()
+    except HTTPError as e:
+        response = e
+        code = e.code
+    try:
+        return code,response.info().get('Content-Type'),response.read().decode('utf-8')
+    finally:
+        response.close()
+
+def test_queries(tmpdir):
+    server = start(tmpdir)
+    try:
+        code,content_type,body = get(server,"/status")
+        assert code == 200
+        assert json.loads(body)['n_tags'] == 4
+        assert json.loads(body)['tmin'] == "2020-03-25"
+
+        code,content_type,body = get(server,"/series?tags=Germany,Vermont&delta=1&tmin=2020-03-26")
+        assert code == 200 and content_type == "application/json"
+        series = json.loads(body)
+        assert series['dates'] == [ "2020-03-26","2020-03-27" ]
+        assert series['values'] == { 'Germany': [ 10,10 ], 'Vermont': [ 10,10 ] }
+
+        code,content_type,body = get(server,"/series?tags=Germany&kind=deceased&format=csv")
+        assert code == 200 and content_type == "text/csv"
+        assert body.split("\n") == [ "date,Germany","2020-03-25,10","2020-03-26,20",
+                                     "2020-03-27,30","" ]
+
+        code,content_type,body = get(server,"/series?tags=Germany,Nowhere")
+        assert code == 404
+        assert "Nowhere" in json.loads(body)['error']
+
+        code,content_type,body = get(server,"/series?tags=Germany&tmin=yesterday")
+        assert code == 400
+    finally:
+        server.shutdown()
+
+def test_relative_without_population(tmpdir):
+    server = start(tmpdir)
+    try:
+        with numpy.errstate(all='raise'):
+            code,content_type,body = server.query("/series",{ 'tags': "Vermont,Atlantis",
+                                                              'relative': "1" })
+        assert code == 200
+        values = json.loads(body)['values']
+        assert values['Vermont'] == [ 1.,2.,3. ]
+        assert all(numpy.isnan(values['Atlantis']))
+    finally:
+        server.shutdown()
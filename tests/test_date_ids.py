@@ -0,0 +1,32 @@
+import datetime
+import numpy
+# Our stuff
+import data_ts
+
+TIMES = [ "3/%d/20"%(day) for day in range(1,32,2) ]
+
+def test_limits_of_any_type():
+    dates = data_ts.parse_dates(TIMES)
+    assert data_ts.date_ids(dates) == (0,16)
+    # both limits included, also as datetime, date, string or numpy date
+    for tmin,tmax in ((datetime.datetime(2020,3,5),datetime.datetime(2020,3,9,12)),
+                      (datetime.date(2020,3,5),"2020-03-09"),
+                      (numpy.datetime64("2020-03-05"),numpy.datetime64("2020-03-09"))):
+        assert data_ts.date_ids(dates,tmin,tmax) == (2,5)
+    # limits between the dates
+    assert data_ts.date_ids(dates,"2020-03-04","2020-03-10") == (2,5)
+    # only one limit, limits outside of the dates, empty range
+    assert data_ts.date_ids(dates,tmin="2020-03-29") == (14,16)
+    assert data_ts.date_ids(dates,tmax="2020-02-01") == (0,0)
+    assert data_ts.date_ids(dates,"2020-03-10","2020-03-06") == (5,5)
+
+def test_trim_and_simulation_dates():
+    data = data_ts.Data_ts("data")
+    data.set_times(TIMES)
+    data.infected = data_ts.Series(tags=[ "Germany" ],matrix=numpy.arange(16).reshape((1,16)))
+    data.trim("2020-03-05","2020-03-09")
+    assert data.times == [ "3/5/20","3/7/20","3/9/20" ]
+    assert list(data.infected["Germany"]) == [ 2,3,4 ]
+
+    # dates of the simulation files have times
+    assert list(data_ts.parse_dates([ "2020-03-31 00:00:00" ])) == [ numpy.datetime64("2020-03-31") ]
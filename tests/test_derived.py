@@ -0,0 +1,42 @@
+import numpy
+# Our stuff
+import data_ts
+
+def make_data():
+    data = data_ts.Data_ts("data")
+    data.set_times([ "1/22/20","1/23/20","1/24/20" ])
+    data.infected = data_ts.Series(tags=[ "Germany","France" ],
+                                   matrix=numpy.array([[1,3,6],[2,2,5]]))
+    data.population = { "Germany": 100, "France": 200 }
+    return data
+
+def test_derived_after_item_assignment():
+    data = make_data()
+    assert list(data.derived('infected','delta')["Germany"]) == [ 0,2,3 ]
+    assert list(data.derived('infected','delta','sum2')["Germany"]) == [ 0,2,5 ]
+    data.infected["Germany"] = [ 1,1,1 ]
+    assert list(data.derived('infected','delta')["Germany"]) == [ 0,0,0 ]
+    assert list(data.derived('infected','delta','sum2')["Germany"]) == [ 0,0,0 ]
+    assert list(data.derived('infected','percent')["Germany"]) == [ 1.,1.,1. ]
+
+def test_derived_after_new_rows_and_series():
+    data = make_data()
+    data.derived('infected','delta')
+    data.infected.add_rows([ "Italy" ],numpy.array([[0,4,4]]))
+    assert list(data.derived('infected','delta')["Italy"]) == [ 0,4,0 ]
+    data.infected = data_ts.Series(tags=[ "Spain" ],matrix=numpy.array([[1,2,4]]))
+    assert data.derived('infected','delta').tags == [ "Spain" ]
+
+def test_derived_cached():
+    data = make_data()
+    assert data.derived('infected','mean2') is data.derived('infected','mean2')
+
+def test_relative_without_population():
+    data = make_data()
+    data.infected.add_rows([ "Atlantis","Nowhere" ],numpy.array([[0,0,0],[1,2,3]]))
+    data.population["Atlantis"] = 0
+    with numpy.errstate(all='raise'):
+        percent = data.derived('infected','percent')
+    assert list(percent["France"]) == [ 1.,1.,2.5 ]
+    assert numpy.isnan(percent["Atlantis"]).all()
+    assert numpy.isnan(percent["Nowhere"]).all()
@@ -0,0 +1,45 @@
+import numpy
+import pytest
+# Our stuff
+import deterministic
+import simulation
+
+def make_simulation(pi_initial=0.03,reco_mean=10):
+    return simulation.Simulation(100000,50,80,reco_mean,4,pi_initial,0,0.05,7,3,"2020-03-31",
+                                 "cohort")
+
+@pytest.mark.parametrize("model",[ "age","sir" ])
+def test_people_are_conserved(model):
+    compartmental = deterministic.from_simulations([ make_simulation() ],model)
+    infected,recovered,deceased = [ x[0] for x in compartmental.run() ]
+    assert len(infected) == 80
+    total = infected+recovered+deceased
+    assert total[0] == 200
+    # the new infections of a day come from the people not infected so far (N = S+I+R+D)
+    susceptible = 100000 - total
+    new = susceptible[:-1]*(1.-numpy.exp(-compartmental.beta[0]*infected[:-1]/100000.))
+    assert numpy.allclose(numpy.diff(total),new)
+    assert susceptible[-1] > 0 and total[-1] > 50000
+    assert numpy.allclose(deceased[1:],0.05*(recovered[1:]+deceased[1:]))
+
+def test_seir_is_slower_than_sir():
+    sim = make_simulation()
+    sir = deterministic.from_simulations([ sim ],"sir").run()[0][0]
+    seir = deterministic.from_simulations([ sim ],"seir",latent=3.).run()[0][0]
+    assert numpy.argmax(seir) > numpy.argmax(sir)
+
+def test_parameter_sets_are_independent():
+    simulations = [ make_simulation(0.02,8),make_simulation(0.03,10),make_simulation(0.04,12) ]
+    together = deterministic.from_simulations(simulations,"age").run()
+    for k,sim in enumerate(simulations):
+        alone = deterministic.from_simulations([ sim ],"age").run()
+        for x,y in zip(together,alone):
+            assert numpy.allclose(x[k],y[0])
+
+    hists = deterministic.from_simulations(simulations,"age").histories()
+    assert [ len(hist.dates) for hist in hists ] == [ 80 ]*3
+    assert hists[1].infected == numpy.rint(together[0][1]).astype(int).tolist()
+
+def test_unknown_model():
+    with pytest.raises(ValueError):
+        deterministic.from_simulations([ make_simulation() ],"sirs")
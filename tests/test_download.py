@@ -0,0 +1,78 @@
+import threading
+try:
+    from http.server import HTTPServer,BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer,BaseHTTPRequestHandler
+# Our stuff
+import data_ts
+
+CONTENT = b"Province/State,Country/Region,Lat,Long,3/25/20\n,Germany,0,0,300\n"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 25 Mar 2020 12:00:00 GMT"
+
+#---------------------------------------------------------------------------------------------------
+# server of one version of the files (with validators), broken.csv stops in the middle
+#---------------------------------------------------------------------------------------------------
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETAG or \
+           self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag',ETAG)
+        self.send_header('Last-Modified',LAST_MODIFIED)
+        self.send_header('Content-Length',str(len(CONTENT)))
+        self.end_headers()
+        if self.path.endswith("broken.csv"):
+            self.wfile.write(CONTENT[:10])
+            self.close_connection = True
+            return
+        self.wfile.write(CONTENT)
+
+    def log_message(self,*args):
+        pass
+
+def serve(tmpdir):
+    server = HTTPServer(("127.0.0.1",0),Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    data = data_ts.Data_ts(str(tmpdir))
+    data.web_site = "http://127.0.0.1:%d"%(server.server_address[1])
+    data.web_dir = "files"
+    return server,data
+
+def test_download_and_unchanged(tmpdir):
+    server,data = serve(tmpdir)
+    try:
+        status,seconds,validators = data.download_file("a.csv",{},timeout=5)
+        assert status == "updated"
+        assert tmpdir.join("a.csv").read_binary() == CONTENT
+        assert validators == { 'etag': ETAG, 'last_modified': LAST_MODIFIED }
+
+        # same version again: 304 by the ETag or by the date, the file is kept
+        for known in (validators,{ 'etag': ETAG },{ 'last_modified': LAST_MODIFIED }):
+            status,seconds,kept = data.download_file("a.csv",known,timeout=5)
+            assert status == "unchanged"
+            assert kept == known
+        assert tmpdir.join("a.csv").read_binary() == CONTENT
+        assert not tmpdir.join("a.csv.tmp").check()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_failed_download_keeps_the_old_file(tmpdir):
+    server,data = serve(tmpdir)
+    tmpdir.join("broken.csv").write_binary(b"old version\n")
+    try:
+        status,seconds,validators = data.download_file("broken.csv",{},timeout=5)
+        assert status.startswith("failed")
+        assert validators == {}
+        assert tmpdir.join("broken.csv").read_binary() == b"old version\n"
+        assert not tmpdir.join("broken.csv.tmp").check()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,16 @@
+# Our stuff
+import metapopulation
+from test_data_cache import write_files
+
+def test_states_are_not_countries(tmpdir):
+    tmpdir.join("populations.csv").write("# Rank,name,Pop\n1,Germany,83000000\n"
+                                         "2,Georgia,3700000\n,Georgia,10600000\n"
+                                         ",Massachusetts,6900000\n")
+    states,countries = metapopulation.read_populations(str(tmpdir),quiet=True)
+    assert states == {}
+    assert countries == { 'Germany': 83000000, 'Georgia': 3700000 }
+
+    write_files(tmpdir,[ "Germany" ],[ "Massachusetts","Vermont" ])
+    states,countries = metapopulation.read_populations(str(tmpdir),quiet=True)
+    assert states == { 'Massachusetts': 1000, 'Vermont': 1000 }
+    assert 'Massachusetts' not in countries
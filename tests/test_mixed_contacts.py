@@ -0,0 +1,52 @@
+import numpy
+# Our stuff
+import simulation
+import deterministic
+import metapopulation
+
+MIX = [ (0.7,4,200,0.1),(0.3,2,20,0.5) ]
+
+#---------------------------------------------------------------------------------------------------
+# simulation of 200000 people with the given social types
+#---------------------------------------------------------------------------------------------------
+def make_simulation(social,engine="cohort"):
+    return simulation.Simulation(200000,100,60,10,4,0.02,0,0.01,7,3,"2020-03-31",engine,4,"",social)
+
+#---------------------------------------------------------------------------------------------------
+# people ever infected per day, averaged over a few seeds of the cohort engine
+#---------------------------------------------------------------------------------------------------
+def cohort_infected(sim,n_seeds=5):
+    totals = []
+    for seed in range(n_seeds):
+        dates,infected,recovered,deceased = sim.run(seed,quiet=True).days()
+        totals.append(numpy.array(infected)+numpy.array(recovered)+numpy.array(deceased))
+    return numpy.mean(totals,axis=0)
+
+def test_mean_contacts_weighted_by_fraction():
+    sim = make_simulation(MIX)
+    (f0,st0),(f1,st1) = sim.social_types()
+    assert abs(sim.mean_contacts() - (f0*st0.mean_contacts()+f1*st1.mean_contacts())) < 1e-12
+
+def test_deterministic_agrees_with_cohort_for_a_mix():
+    sim = make_simulation(MIX)
+    expected = cohort_infected(sim)
+    infected,recovered,deceased = deterministic.from_simulations([sim]).run()
+    total = (infected+recovered+deceased)[0]
+    assert len(total) == len(expected)
+    assert abs(total[-1]/expected[-1]-1.) < 0.1
+
+    # the mix matters: one social type alone gives a much larger outbreak
+    single = deterministic.from_simulations([make_simulation(None)]).run()
+    assert sum(single)[0][-1] > 1.3*total[-1]
+
+def test_metapopulation_agrees_with_cohort_for_a_mix():
+    sim = make_simulation(MIX)
+    expected = cohort_infected(sim)
+    totals = []
+    for seed in range(5):
+        meta = metapopulation.Metapopulation(sim,[ ("A",200000) ])
+        meta.run(seed,quiet=True)
+        totals.append((meta.infected+meta.recovered+meta.deceased)[0])
+    total = numpy.mean(totals,axis=0)
+    assert len(total) == len(expected)
+    assert abs(total[-1]/expected[-1]-1.) < 0.1
@@ -0,0 +1,41 @@
+import numpy
+# Our stuff
+import simulation
+
+#---------------------------------------------------------------------------------------------------
+# small outbreak simulation with the given engine
+#---------------------------------------------------------------------------------------------------
+def make_simulation(engine):
+    return simulation.Simulation(10000,25,25,10,4,0.03,0,0.05,7,3,"2020-03-31",engine)
+
+#---------------------------------------------------------------------------------------------------
+# people ever infected at the end, averaged over a few seeds
+#---------------------------------------------------------------------------------------------------
+def outbreak(engine,n_seeds=6):
+    totals = []
+    for seed in range(n_seeds):
+        dates,infected,recovered,deceased = make_simulation(engine).run(seed,quiet=True).days()
+        totals.append(infected[-1]+recovered[-1]+deceased[-1])
+    return numpy.mean(totals)
+
+def test_array_agrees_with_person_engine():
+    total = outbreak("array")
+    assert total > 1000
+    assert abs(total/outbreak("person")-1.) < 0.15
+
+def test_array_same_seed_same_outbreak():
+    assert make_simulation("array").run(7,quiet=True).days() == \
+        make_simulation("array").run(7,quiet=True).days()
+
+def test_array_status_matches_compartments():
+    sim = make_simulation("array")
+    popul,corona,hist,i_days,today = sim.initial_state(1,"",True,False)
+    assert popul.i() == 100
+    for day in range(15):
+        popul.spread(corona)
+        status = popul.status[:popul.n()]
+        for value,compartment in ((1,popul.infected),(-1,popul.recovered),(-2,popul.deceased)):
+            assert sorted(compartment.ids()) == list(numpy.flatnonzero(status == value))
+        # nobody infected twice, the infected are done in the future
+        assert (popul.day_r[popul.infected.ids()] >= popul.day).all()
+    assert popul.r() + popul.d() > 0
@@ -0,0 +1,60 @@
+import numpy
+# Our stuff
+import data_ts
+from test_data_cache import write_files
+
+US = '''UID,iso2,iso3,code3,FIPS,Admin2,Province_State,Country_Region,Lat,Long_,Combined_Key,Population,1/22/20,1/23/20,1/24/20
+1,US,USA,840,25001.0,Barnstable,Massachusetts,US,41.7,-70.3,"Barnstable, Massachusetts, US",212990,1,2,3
+2,US,USA,840,25003.0,Berkshire,Massachusetts,US,42.4,-73.2,"Berkshire, Massachusetts, US",124944,0,5,9
+3,US,USA,840,50001.0,Addison,Vermont,US,44.0,-73.1,"Addison, Vermont, US",36777,4,4,4
+'''
+
+GLOBAL = '''Province/State,Country/Region,Lat,Long,1/22/20,1/23/20,1/24/20
+Alberta,Canada,53.9,-116.6,1,2,3
+Ontario,Canada,51.3,-85.3,10,20,30
+,Germany,51.2,10.5,0,1,1
+,Niger,17.6,8.1,2,2,2
+,Nigeria,9.1,8.7,5,5,5
+'''
+
+def test_rows_summed_per_tag(tmpdir):
+    tmpdir.join("us.csv").write(US)
+    tmpdir.join("global.csv").write(GLOBAL)
+    data = data_ts.Data_ts(str(tmpdir))
+    values = data_ts.Series()
+    population = {}
+    data.read_file("us.csv",values,population,quiet=True)
+    data.read_file("global.csv",values,population,quiet=True)
+
+    assert data.times == [ "1/22/20","1/23/20","1/24/20" ]
+    assert values.tags == [ "Massachusetts","Vermont","Canada","Germany","Niger","Nigeria" ]
+    assert values.matrix.dtype == numpy.int64
+    assert list(values["Massachusetts"]) == [ 1,7,12 ]
+    assert list(values["Vermont"]) == [ 4,4,4 ]
+    assert list(values["Canada"]) == [ 11,22,33 ]
+    assert population == { "Massachusetts": 212990+124944, "Vermont": 36777 }
+
+    # a second file of the same kind adds up
+    data.read_file("global.csv",values,population,quiet=True)
+    assert list(values["Canada"]) == [ 22,44,66 ]
+
+def test_only_requested_tags(tmpdir):
+    tmpdir.join("us.csv").write(US)
+    tmpdir.join("global.csv").write(GLOBAL)
+    data = data_ts.Data_ts(str(tmpdir))
+    values = data_ts.Series()
+    population = {}
+    # Niger is part of the line of Nigeria, Vermont part of the keys of its counties
+    for f in ("us.csv","global.csv"):
+        data.read_file(f,values,population,quiet=True,tags=[ "Niger","Vermont" ])
+    assert values.tags == [ "Vermont","Niger" ]
+    assert list(values["Niger"]) == [ 2,2,2 ]
+    assert population == { "Vermont": 36777 }
+
+def test_only_requested_kinds_without_cache(tmpdir):
+    data = write_files(tmpdir,[ "Germany","France" ],[ "Vermont" ])
+    data.load_data(quiet=True,cache=False,tags=[ "France","Vermont" ],kinds=('deceased',))
+    assert len(data.infected) == 0
+    assert data.deceased.tags == [ "France","Vermont" ]
+    assert data.population["Germany"] == 83000000
+    assert not tmpdir.join(data.cache_file).check()
@@ -0,0 +1,37 @@
+import math
+import numpy
+# Our stuff
+import rgvd
+
+def test_pool_moments():
+    numpy.random.seed(4)
+    gauss = rgvd.Rgvd(10.,4.,0,n_pool=1000)
+    values = numpy.concatenate([ gauss.sample(700) for i in range(50) ])
+    assert len(values) == 35000
+    assert abs(values.mean()-10.) < 0.1
+    assert abs(values.std()-4.) < 0.1
+    assert len(numpy.unique(values)) == len(values)
+
+def test_positive_pool_is_truncated():
+    numpy.random.seed(5)
+    positive = rgvd.Rgvd(2.,3.,1,n_pool=1000)
+    values = numpy.array([ positive.next() for i in range(5000) ] + list(positive.sample(20000)))
+    assert values.min() >= 0.
+    # mean of the Gaussian truncated at 0
+    a = -2./3.
+    phi = math.exp(-a*a/2.)/math.sqrt(2.*math.pi)
+    mean = 2. + 3.*phi/(1.-0.5*(1.+math.erf(a/math.sqrt(2.))))
+    assert abs(values.mean()-mean) < 0.05
+    assert abs(numpy.mean(values < 2.)-positive.cdf(2.)) < 0.01
+
+def test_pool_is_used_up_in_order():
+    numpy.random.seed(6)
+    gauss = rgvd.Rgvd(0.,1.,0,n_pool=10)
+    gauss.fill()
+    pool = gauss.pool.copy()
+    assert list(gauss.sample(4)) == list(pool[:4])
+    assert gauss.next() == pool[4]
+    assert list(gauss.sample(5)) == list(pool[5:])
+    # the next request refills the pool
+    assert gauss.next() not in pool
+    assert gauss.i_pool == 1
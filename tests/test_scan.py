@@ -0,0 +1,34 @@
+import datetime
+import pytest
+# Our stuff
+import parameter
+import scan
+import simulation
+
+def make_simulation():
+    return simulation.Simulation(1000,10,30,10,4,0.02,0,0.01,7,3,"2020-03-31","cohort")
+
+def test_unknown_parameters():
+    sim = make_simulation()
+    parameters = [ parameter.Parameter(name,name,0.5,0.1,0.,1.)
+                   for name in ('pi_initial','pi_inital','engine','exposure_avg','pi_decay') ]
+    assert scan.unknown_parameters(sim,parameters) == [ 'pi_inital','engine','pi_decay' ]
+
+def test_scan_rejects_unknown_parameters():
+    with pytest.raises(ValueError):
+        scan.Scan(make_simulation(),[ parameter.Parameter('pi_inital','pi_inital',0.5) ],[],[])
+
+def test_integer_parameters_stay_integers():
+    sim = make_simulation()
+    dates = [ datetime.datetime.strptime("2020-03-31","%Y-%m-%d")+datetime.timedelta(days=i)
+              for i in range(20) ]
+    values = [ 10*1.1**i for i in range(20) ]
+    parameters = [ parameter.Parameter('i_initial','i_initial',10,3,5,15),
+                   parameter.Parameter('n_days','n_days',30,5,20,40),
+                   parameter.Parameter('pi_initial','pi_initial',0.02,0.005,0.01,0.03) ]
+    fit = scan.Scan(sim,parameters,dates,values,model="sir")
+    point,chi2 = fit.grid(4)
+    assert [ type(x) for x in point ] == [ int,int,float ]
+    assert sorted(set([ p[0] for p in fit.results ])) == [ 5,8,12,15 ]
+    point,chi2 = fit.adaptive(4)
+    assert all([ isinstance(p[0],int) and isinstance(p[1],int) for p in fit.results ])
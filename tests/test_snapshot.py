@@ -0,0 +1,43 @@
+import os
+import numpy
+# Our stuff
+import simulation
+import snapshot
+
+def make_simulation(start=""):
+    return simulation.Simulation(10000,25,20,10,4,0.03,0,0.05,7,3,"2020-03-31","array",4,start)
+
+def test_run_from_snapshot_continues_the_run(tmpdir):
+    directory = str(tmpdir.join("day8"))
+    full = make_simulation().run(3,quiet=True,save=directory,save_day=8).days()
+    assert snapshot.Snapshot(directory).exists()
+    assert not os.path.exists(directory+".tmp")
+
+    # same seed: exactly the saved run, other seed: the same first days, then branching off
+    assert make_simulation(directory).run(3,quiet=True).days() == full
+    other = make_simulation(directory).run(4,quiet=True).days()
+    assert [ days[:9] for days in other ] == [ days[:9] for days in full ]
+    assert other != full
+
+def test_snapshot_round_trip(tmpdir):
+    sim = make_simulation()
+    popul,corona,hist,i_days,today = sim.initial_state(5,"",True,False)
+    for day in range(6):
+        hist.add_day(today,popul.i(),popul.r(),popul.d())
+        popul.spread(corona)
+    snapshot.Snapshot(str(tmpdir)).save(popul,corona,hist,5,6,today)
+
+    loaded,state = snapshot.Snapshot(str(tmpdir)).load()
+    assert (state['seed'],state['i_days'],state['today']) == (5,6,today)
+    assert state['history'] == hist.days()
+    assert loaded.n() == popul.n() and loaded.day == popul.day
+    for name in ('status','day_i','day_r','social'):
+        assert (getattr(loaded,name) == getattr(popul,name)[:popul.n()]).all()
+    for name in ('infected','recovered','deceased'):
+        assert list(getattr(loaded,name).ids()) == list(getattr(popul,name).ids())
+    assert [ st.summary() for st in loaded.social_types ] == \
+        [ st.summary() for st in popul.social_types ]
+
+    # the files stay as they are when the loaded population goes on (copy on write)
+    loaded.spread(state['pathogen'])
+    assert (numpy.load(str(tmpdir.join("status.npy"))) == popul.status[:popul.n()]).all()